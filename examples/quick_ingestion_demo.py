@@ -22,10 +22,34 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'threatcrew', 'src
 
 from threatcrew.managers.threat_feed_manager import get_threat_feed_manager
 
-# Set up logging
+try:
+    from orjson import dumps as json_dumps
+except ImportError:
+    json_dumps = lambda obj: json.dumps(obj).encode()
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per record; avoids asctime string formatting."""
+    
+    def format(self, record):
+        return json_dumps({
+            "ts": record.created,
+            "logger": record.name,
+            "level": record.levelname,
+            "msg": record.getMessage()
+        }).decode()
+
+
+# Set up logging (THREATAGENT_LOG_LEVEL=WARNING for quiet runs,
+# THREATAGENT_LOG_FORMAT=json for structured output)
+log_handler = logging.StreamHandler()
+if os.getenv("THREATAGENT_LOG_FORMAT", "text").lower() == "json":
+    log_handler.setFormatter(JsonLogFormatter())
+else:
+    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=os.getenv("THREATAGENT_LOG_LEVEL", "INFO").upper(),
+    handlers=[log_handler]
 )
 logger = logging.getLogger(__name__)
 
@@ -93,24 +117,22 @@ def print_feed_status(tfm):
         print(f"   Interval: {feed_info['update_interval']} minutes")
         print()
 
-async def demo_single_feed_processing(tfm):
-    """Demonstrate processing a single feed manually."""
-    logger.info("🔬 Demonstrating single feed processing...")
+async def demo_feed_processing(tfm):
+    """Demonstrate processing all active feeds concurrently."""
+    logger.info("🔬 Demonstrating concurrent feed processing...")
     
-    # Find a feed to process
     active_feeds = [f for f in tfm.feeds if f.active]
     if not active_feeds:
         logger.warning("No active feeds available for demo")
         return
     
-    demo_feed = active_feeds[0]
-    logger.info(f"Processing feed: {demo_feed.name}")
+    logger.info(f"Processing {len(active_feeds)} feeds concurrently")
     
     try:
-        await tfm._process_feed(demo_feed)
-        logger.info(f"✅ Successfully processed {demo_feed.name}")
+        await tfm.process_feeds(active_feeds)
+        logger.info(f"✅ Successfully processed {len(active_feeds)} feeds")
     except Exception as e:
-        logger.error(f"❌ Error processing {demo_feed.name}: {e}")
+        logger.error(f"❌ Error processing feeds: {e}")
 
 async def run_limited_monitoring(tfm, duration_minutes=2):
     """Run threat feed monitoring for a limited time (demo purposes)."""
@@ -173,8 +195,8 @@ async def main():
     # Show feed status
     print_feed_status(tfm)
     
-    # Demo single feed processing
-    await demo_single_feed_processing(tfm)
+    # Demo concurrent feed processing
+    await demo_feed_processing(tfm)
     
     # Ask user if they want to run limited monitoring
     try:
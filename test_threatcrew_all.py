@@ -1,77 +1,153 @@
 import pytest
+import asyncio
 import os
+import sys
 import json
+import sqlite3
+import time
+import importlib.util
 from pathlib import Path
 
+# orjson parses JSONL noticeably faster; fall back to stdlib json when absent
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+TESTS_DIR = Path("threatcrew/tests")
+MEMORY_DB = Path("threatcrew/src/knowledge/threat_memory.db")
+TRAINING_FILE = Path("threatcrew/src/knowledge/training_data/threat_intelligence_dataset_20250615_124031.jsonl")
+REPORT_FILE = Path("threatcrew/src/threatcrew/tools/consolidated_report.json")
+
+# Scripts import threatcrew.* from the package sources
+sys.path.insert(0, str(Path("threatcrew/src").resolve()))
+
+
+def load_script(name):
+    """Import a script from threatcrew/tests in-process so its main() can be called directly."""
+    spec = importlib.util.spec_from_file_location(name, TESTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope="session")
+def file_stats():
+    """Stat results for files next to the checked data paths, one scandir per directory."""
+    stats = {}
+    for directory in {path.parent for path in (MEMORY_DB, TRAINING_FILE, REPORT_FILE)}:
+        try:
+            with os.scandir(directory) as entries:
+                stats.update({Path(entry.path): entry.stat() for entry in entries if entry.is_file()})
+        except FileNotFoundError:
+            pass
+    return stats
+
 # Test memory DB exists and is valid
 @pytest.mark.memory
-def test_memory_db_exists():
-    db_path = Path("threatcrew/src/knowledge/threat_memory.db")
-    assert db_path.exists(), f"Memory DB not found at {db_path}"
+def test_memory_db_exists(file_stats):
+    assert MEMORY_DB in file_stats, f"Memory DB not found at {MEMORY_DB}"
 
 # Test training data exists and is valid JSONL
 @pytest.mark.training
-def test_training_data_exists_and_valid():
-    training_file = Path("threatcrew/src/knowledge/training_data/threat_intelligence_dataset_20250615_124031.jsonl")
-    assert training_file.exists(), f"Training data not found at {training_file}"
-    with open(training_file) as f:
+def test_training_data_exists_and_valid(file_stats):
+    assert TRAINING_FILE in file_stats, f"Training data not found at {TRAINING_FILE}"
+    with open(TRAINING_FILE, "rb") as f:
         for line in f:
-            json.loads(line)  # Should not raise
+            json_loads(line)  # Should not raise
 
 # Test consolidated report (if exists) is valid JSON
 @pytest.mark.report
-def test_consolidated_report_valid():
-    report_file = Path("threatcrew/src/threatcrew/tools/consolidated_report.json")
-    if report_file.exists():
-        with open(report_file) as f:
+def test_consolidated_report_valid(file_stats):
+    if REPORT_FILE in file_stats:
+        with open(REPORT_FILE) as f:
             json.load(f)  # Should not raise
 
 # Test that verify_system.py runs without error
 @pytest.mark.system
-def test_verify_system_runs():
-    result = os.system("python3 threatcrew/tests/verify_system.py")
-    assert result == 0
+def test_verify_system_runs(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["verify_system.py"])
+    load_script("verify_system").main()
 
 # Test that simple_memory_test.py runs without error
 @pytest.mark.memory
 def test_simple_memory_test_runs():
-    result = os.system("python3 threatcrew/tests/simple_memory_test.py")
-    assert result == 0
+    load_script("simple_memory_test").main()
 
 # Test that demo_complete_system.py runs without error
 @pytest.mark.demo
 def test_demo_complete_system_runs():
-    result = os.system("python3 threatcrew/tests/demo_complete_system.py")
-    assert result == 0
+    load_script("demo_complete_system").main()
 
 # Test that demo_targeting_system.py runs without error
 @pytest.mark.demo
 def test_demo_targeting_system_runs():
-    result = os.system("python3 threatcrew/tests/demo_targeting_system.py")
-    assert result == 0
+    load_script("demo_targeting_system").main()
 
 # Test that ge_vernova_end_to_end_demo.py runs without error
 @pytest.mark.demo
 def test_ge_vernova_end_to_end_demo_runs():
-    result = os.system("python3 threatcrew/tests/ge_vernova_end_to_end_demo.py")
-    assert result == 0
+    assert load_script("ge_vernova_end_to_end_demo").main()
 
 # Test that setup_memory_finetuning.py runs without error
 @pytest.mark.setup
-def test_setup_memory_finetuning_runs():
-    # Use echo n | python3 ... for portable input
-    result = os.system("echo n | python3 threatcrew/tests/setup_memory_finetuning.py")
-    assert result == 0
+def test_setup_memory_finetuning_runs(monkeypatch):
+    # Answer "n" to the sample-data prompt without spawning a shell
+    monkeypatch.setattr("builtins.input", lambda _: "n")
+    load_script("setup_memory_finetuning").main()
 
 # Test that simple_run.py runs without error
 @pytest.mark.demo
 def test_simple_run_runs():
-    result = os.system("python3 threatcrew/tests/simple_run.py")
-    assert result == 0
+    load_script("simple_run").main()
 
 # Test that crewagents_validation.py runs without error
 @pytest.mark.validation
 def test_crewagents_validation_runs():
-    result = os.system("python3 threatcrew/tests/crewagents_validation.py")
-    assert result == 0
+    load_script("crewagents_validation").main()
 
+# Test that the learning rollup and the full scan evaluate the same window
+@pytest.mark.memory
+def test_learning_rollup_matches_scan(tmp_path, monkeypatch):
+    clm = pytest.importorskip("threatcrew.managers.continuous_learning_manager")
+    from threatcrew.tools import memory_system
+    monkeypatch.setattr(memory_system, "EMBEDDINGS_AVAILABLE", False)
+    memory = memory_system.ThreatMemoryDB(str(tmp_path / "threat_memory.db"))
+    monkeypatch.setattr(clm, "get_memory", lambda: memory)
+    monkeypatch.setattr(clm, "ThreatFineTuner", lambda: None)
+    
+    samples = [
+        ("ioc_classification", "banking login .tk", {"risk_level": "LOW", "category": "phishing"}, 0.9),
+        ("ioc_classification", "update.exe", {"risk_level": "HIGH", "category": "malware"}, 0.5),
+        ("ioc_classification", "example.org", {"risk_level": "LOW", "category": "benign"}, 0.95),
+        ("crew_workflow", "{}", "report", 0.8),
+    ]
+    for analysis_type, input_data, output_data, confidence in samples * 3:
+        memory.store_analysis("s", analysis_type, input_data, output_data, confidence, 1.5)
+    manager = clm.ContinuousLearningManager()
+    manager._get_connection()
+    
+    # Writes after the rollup exists: rows either side of the hour the window starts in,
+    # a delete and an update
+    window_hour = (int(time.time()) - 24 * 3600) // 3600 * 3600
+    conn = sqlite3.connect(memory.db_path)
+    for created_at in (window_hour - 60, window_hour + 1, window_hour + 3599, int(time.time()) - 7200):
+        conn.execute(
+            "INSERT INTO analysis_history (session_id, analysis_type, input_data, output_data, confidence, "
+            "processing_time, created_at) VALUES ('s', 'ioc_classification', '\"paypal.tk\"', "
+            "'{\"risk_level\": \"CRITICAL\"}', 0.4, 2.0, datetime(?, 'unixepoch'))",
+            (created_at,)
+        )
+    conn.execute("DELETE FROM analysis_history WHERE id = 1")
+    conn.execute("UPDATE analysis_history SET confidence = 0.3 WHERE id = 2")
+    conn.commit()
+    conn.close()
+    
+    assert manager._rollup_available
+    rollup = asyncio.run(manager._evaluate_current_performance())
+    rollup_window = manager._last_window_size
+    manager._rollup_available = False
+    scan = asyncio.run(manager._evaluate_current_performance())
+    
+    assert rollup_window == manager._last_window_size > 0
+    for field in ("accuracy", "confidence", "processing_time", "false_positive_rate", "false_negative_rate"):
+        assert getattr(rollup, field) == pytest.approx(getattr(scan, field)), field
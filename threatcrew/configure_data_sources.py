@@ -10,6 +10,8 @@ datasets or allow mixed real/synthetic data for training.
 import os
 import sys
 import json
+import sqlite3
+from functools import lru_cache
 from pathlib import Path
 
 # Add the threatcrew module to the path
@@ -17,33 +19,21 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 src_dir = os.path.join(current_dir, 'src')
 sys.path.insert(0, src_dir)
 
+config_dir = os.path.join(current_dir, 'src', 'threatcrew', 'config')
+CONFIG_FILE = os.path.join(config_dir, 'data_source_config.json')
+
 try:
-    from threatcrew.config.data_source_config import DATA_SOURCE_CONFIG, TRAINING_CONFIG
+    from threatcrew.config import data_source_config as config_module
 except ImportError:
-    # Fallback to direct file reading if module import fails
-    config_file = os.path.join(current_dir, 'src', 'threatcrew', 'config', 'data_source_config.py')
-    if os.path.exists(config_file):
-        import importlib.util
-        spec = importlib.util.spec_from_file_location("data_source_config", config_file)
-        config_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(config_module)
-        DATA_SOURCE_CONFIG = config_module.DATA_SOURCE_CONFIG
-        TRAINING_CONFIG = config_module.TRAINING_CONFIG
-    else:
-        # Default configuration if file doesn't exist
-        DATA_SOURCE_CONFIG = {
-            "USE_REAL_DATA_ONLY": True,
-            "DISABLE_SYNTHETIC_DATA": True,
-            "MIN_CONFIDENCE_THRESHOLD": 0.5,
-            "MAX_EXAMPLES_PER_CATEGORY": 1000,
-            "ALLOWED_DATA_SOURCES": ["memory_database", "historical_analysis", "real_iocs", "actual_reports"],
-            "EXCLUDED_DATA_SOURCES": ["synthetic", "generated", "example", "demo", "test"]
-        }
-        TRAINING_CONFIG = {
-            "VERIFIED_DATA_ONLY": True,
-            "REQUIRE_SOURCE_ATTRIBUTION": True,
-            "FILTER_SUSPICIOUS_PATTERNS": True
-        }
+    # Load the config module straight from its file so the settings and their
+    # helpers keep a single definition
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("data_source_config", os.path.join(config_dir, 'data_source_config.py'))
+    config_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config_module)
+
+DATA_SOURCE_CONFIG = config_module.DATA_SOURCE_CONFIG
+TRAINING_CONFIG = config_module.TRAINING_CONFIG
 
 
 def set_real_data_only_mode(enabled: bool = True):
@@ -53,28 +43,24 @@ def set_real_data_only_mode(enabled: bool = True):
     Args:
         enabled: True to enable real data only mode, False to allow mixed data
     """
-    config_file = os.path.join(os.path.dirname(__file__), '..', 'src', 'threatcrew', 'config', 'data_source_config.py')
+    global DATA_SOURCE_CONFIG, TRAINING_CONFIG
     
     # Read current configuration
-    with open(config_file, 'r') as f:
-        content = f.read()
+    with open(CONFIG_FILE, 'r') as f:
+        config = json.load(f)
     
     # Update configuration values
-    new_content = content.replace(
-        '"USE_REAL_DATA_ONLY": True' if enabled else '"USE_REAL_DATA_ONLY": False',
-        f'"USE_REAL_DATA_ONLY": {enabled}'
-    ).replace(
-        '"DISABLE_SYNTHETIC_DATA": True' if enabled else '"DISABLE_SYNTHETIC_DATA": False',
-        f'"DISABLE_SYNTHETIC_DATA": {enabled}'
-    )
+    config["DATA_SOURCE_CONFIG"]["USE_REAL_DATA_ONLY"] = enabled
+    config["DATA_SOURCE_CONFIG"]["DISABLE_SYNTHETIC_DATA"] = enabled
     
-    # Write updated configuration
-    with open(config_file, 'w') as f:
-        f.write(new_content)
+    # Write updated configuration and pick up the new values
+    config_module.save_config(config)
+    DATA_SOURCE_CONFIG = config_module.DATA_SOURCE_CONFIG
+    TRAINING_CONFIG = config_module.TRAINING_CONFIG
     
     mode = "REAL DATA ONLY" if enabled else "MIXED DATA"
     print(f"✅ ThreatAgent configured for {mode} mode")
-    print(f"📁 Configuration updated: {config_file}")
+    print(f"📁 Configuration updated: {CONFIG_FILE}")
 
 
 def show_current_config():
@@ -85,8 +71,8 @@ def show_current_config():
     print(f"Disable Synthetic Data: {DATA_SOURCE_CONFIG['DISABLE_SYNTHETIC_DATA']}")
     print(f"Min Confidence Threshold: {DATA_SOURCE_CONFIG['MIN_CONFIDENCE_THRESHOLD']}")
     print(f"Max Examples Per Category: {DATA_SOURCE_CONFIG['MAX_EXAMPLES_PER_CATEGORY']}")
-    print(f"Allowed Data Sources: {', '.join(DATA_SOURCE_CONFIG['ALLOWED_DATA_SOURCES'])}")
-    print(f"Excluded Data Sources: {', '.join(DATA_SOURCE_CONFIG['EXCLUDED_DATA_SOURCES'])}")
+    print(f"Allowed Data Sources: {', '.join(sorted(DATA_SOURCE_CONFIG['ALLOWED_DATA_SOURCES']))}")
+    print(f"Excluded Data Sources: {', '.join(sorted(DATA_SOURCE_CONFIG['EXCLUDED_DATA_SOURCES']))}")
     print()
     print("🎯 Training Configuration:")
     print(f"Verified Data Only: {TRAINING_CONFIG['VERIFIED_DATA_ONLY']}")
@@ -94,38 +80,50 @@ def show_current_config():
     print(f"Filter Suspicious Patterns: {TRAINING_CONFIG['FILTER_SUSPICIOUS_PATTERNS']}")
 
 
+# Real IOC / analysis record counts, built once so repeated validations
+# reuse the same statement (and sqlite's per-connection statement cache).
+# iocs.is_synthetic is set from is_excluded_source when an IOC is stored, so
+# "demo_test" or "synthetic_example" is not counted as real data and the
+# count is a range scan of idx_iocs_synthetic_source.
+REAL_DATA_COUNTS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM iocs WHERE is_synthetic = 0 AND source IS NOT NULL),
+        (SELECT COUNT(*) FROM analysis_history WHERE input_data IS NOT NULL)
+"""
+
+
+@lru_cache(maxsize=1)
+def _get_readonly_connection(db_path: str) -> sqlite3.Connection:
+    """Open (once) a read-only autocommit connection to the memory database."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('PRAGMA query_only=ON')
+    return conn
+
+
 def validate_real_data_availability():
     """Check if sufficient real threat intelligence data is available."""
     try:
         from threatcrew.tools.memory_system import get_memory
-        import sqlite3
         
         memory = get_memory()
         db_path = memory.db_path if hasattr(memory, 'db_path') else memory
         
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Check IOCs
-            cursor.execute("SELECT COUNT(*) FROM iocs WHERE source NOT LIKE '%demo%' AND source NOT LIKE '%synthetic%'")
-            real_iocs = cursor.fetchone()[0]
-            
-            # Check analysis history
-            cursor.execute("SELECT COUNT(*) FROM analysis_history WHERE input_data IS NOT NULL")
-            analysis_records = cursor.fetchone()[0]
-            
-            print("📊 Real Data Availability Assessment:")
-            print("=" * 40)
-            print(f"Real IOCs in database: {real_iocs}")
-            print(f"Analysis history records: {analysis_records}")
+        # Count real IOCs and analysis history records in one round trip
+        cursor = _get_readonly_connection(db_path).execute(REAL_DATA_COUNTS_SQL)
+        real_iocs, analysis_records = cursor.fetchone()
+        
+        print("📊 Real Data Availability Assessment:")
+        print("=" * 40)
+        print(f"Real IOCs in database: {real_iocs}")
+        print(f"Analysis history records: {analysis_records}")
+        
+        if real_iocs < 10:
+            print("⚠️  WARNING: Limited real IOC data available!")
+            print("   Consider importing more real threat intelligence before enabling real-data-only mode.")
+        else:
+            print("✅ Sufficient real data available for training")
             
-            if real_iocs < 10:
-                print("⚠️  WARNING: Limited real IOC data available!")
-                print("   Consider importing more real threat intelligence before enabling real-data-only mode.")
-            else:
-                print("✅ Sufficient real data available for training")
-                
-            return real_iocs >= 10
+        return real_iocs >= 10
             
     except Exception as e:
         print(f"❌ Error checking data availability: {e}")
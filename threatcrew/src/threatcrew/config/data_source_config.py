@@ -3,48 +3,85 @@ ThreatAgent Data Source Configuration
 ====================================
 
 Configuration settings for controlling the data sources used in threat intelligence training.
+
+Settings live in ``data_source_config.json`` next to this module and are parsed
+once per process. Use ``save_config`` (or ``configure_data_sources.py``) to change them;
+it rebinds the module-level settings, while names imported elsewhere keep the values
+they were imported with. The exported mappings are read-only and their source lists
+are frozensets.
+
+DATA_SOURCE_CONFIG keys:
+    USE_REAL_DATA_ONLY         - Use only real threat intelligence data from memory database
+    DISABLE_SYNTHETIC_DATA     - Disable synthetic data generation
+    MIN_CONFIDENCE_THRESHOLD   - Minimum confidence for real data to be included
+    MAX_EXAMPLES_PER_CATEGORY  - Maximum number of examples per category
+    ALLOWED_DATA_SOURCES       - Data sources to include
+    EXCLUDED_DATA_SOURCES      - Data sources to exclude
+
+TRAINING_CONFIG keys:
+    VERIFIED_DATA_ONLY         - Only use verified real threat intelligence
+    REQUIRE_SOURCE_ATTRIBUTION - Require source attribution for all training data
+    FILTER_SUSPICIOUS_PATTERNS - Filter out training examples with suspicious patterns
 """
 
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
+
+CONFIG_FILE = Path(__file__).with_name("data_source_config.json")
+
+
+@lru_cache(maxsize=1)
+def load_config() -> Dict[str, Any]:
+    """Load and cache the data source configuration file."""
+    with open(CONFIG_FILE, 'r') as f:
+        return json.load(f)
+
+
+def save_config(config: Dict[str, Any]):
+    """Atomically replace the configuration file and reload the module settings."""
+    tmp_file = CONFIG_FILE.with_name(CONFIG_FILE.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(config, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_file, CONFIG_FILE)
+    reload_config()
+
+
+def _freeze(section: Dict[str, Any]) -> Mapping[str, Any]:
+    """Return a read-only view of a config section with lists turned into frozensets."""
+    return MappingProxyType({
+        key: frozenset(value) if isinstance(value, list) else value
+        for key, value in section.items()
+    })
+
+
 # Data source configuration
-DATA_SOURCE_CONFIG = {
-    # Use only real threat intelligence data from memory database
-    "USE_REAL_DATA_ONLY": True,
-    
-    # Disable synthetic data generation
-    "DISABLE_SYNTHETIC_DATA": True,
-    
-    # Minimum confidence threshold for real data to be included
-    "MIN_CONFIDENCE_THRESHOLD": 0.5,
-    
-    # Maximum number of examples per category
-    "MAX_EXAMPLES_PER_CATEGORY": 1000,
-    
-    # Data sources to include
-    "ALLOWED_DATA_SOURCES": [
-        "memory_database",
-        "historical_analysis",
-        "real_iocs",
-        "actual_reports"
-    ],
-    
-    # Data sources to exclude
-    "EXCLUDED_DATA_SOURCES": [
-        "synthetic",
-        "generated",
-        "example",
-        "demo",
-        "test"
-    ]
-}
+DATA_SOURCE_CONFIG = _freeze(load_config()["DATA_SOURCE_CONFIG"])
 
 # Training dataset configuration
-TRAINING_CONFIG = {
-    # Only use verified real threat intelligence
-    "VERIFIED_DATA_ONLY": True,
-    
-    # Require source attribution for all training data
-    "REQUIRE_SOURCE_ATTRIBUTION": True,
-    
-    # Filter out training examples with suspicious patterns
-    "FILTER_SUSPICIOUS_PATTERNS": True
-}
+TRAINING_CONFIG = _freeze(load_config()["TRAINING_CONFIG"])
+
+ALLOWED_DATA_SOURCES = DATA_SOURCE_CONFIG["ALLOWED_DATA_SOURCES"]
+EXCLUDED_DATA_SOURCES = DATA_SOURCE_CONFIG["EXCLUDED_DATA_SOURCES"]
+
+
+def reload_config():
+    """Re-read the configuration file and rebind the module-level settings."""
+    global DATA_SOURCE_CONFIG, TRAINING_CONFIG, ALLOWED_DATA_SOURCES, EXCLUDED_DATA_SOURCES
+    load_config.cache_clear()
+    DATA_SOURCE_CONFIG = _freeze(load_config()["DATA_SOURCE_CONFIG"])
+    TRAINING_CONFIG = _freeze(load_config()["TRAINING_CONFIG"])
+    ALLOWED_DATA_SOURCES = DATA_SOURCE_CONFIG["ALLOWED_DATA_SOURCES"]
+    EXCLUDED_DATA_SOURCES = DATA_SOURCE_CONFIG["EXCLUDED_DATA_SOURCES"]
+
+_SOURCE_TOKEN_SPLIT = re.compile(r'[^a-z0-9]+')
+
+
+def is_excluded_source(source: str) -> bool:
+    """True if any token of a source name (e.g. "demo" in "demo_feed") is an excluded source."""
+    return not EXCLUDED_DATA_SOURCES.isdisjoint(_SOURCE_TOKEN_SPLIT.split(source.lower()))
@@ -6,16 +6,92 @@ This module provides comprehensive targeting capabilities for focused threat int
 Users can specify URLs, companies, industries, threat types, and custom parameters.
 """
 
+import copy
 import json
 import yaml
 import os
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import attrgetter
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Any, Iterator, Mapping, Optional, Tuple
+from dataclasses import dataclass, field
 from pathlib import Path
-from ..utils.campaign_file import save_campaign_file
+from urllib.parse import urlparse
+from ..utils.campaign_file import generate_campaign_filename
 
-@dataclass
+# Optional multi-pattern matcher for large keyword sets
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Prefer the libyaml-backed C loader/dumper; same output, far faster parsing
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _SafeDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _SafeDumper
+
+# orjson serializes campaign exports several times faster than stdlib json
+try:
+    import orjson
+    
+    def _json_dumps(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(data: Any) -> bytes:
+        return json.dumps(data, indent=2, default=str).encode('utf-8')
+    
+    _json_loads = json.loads
+
+class _YamlDumper(_SafeDumper):
+    """Safe dumper that writes shared lists/dicts inline rather than as YAML aliases."""
+    
+    def ignore_aliases(self, data):
+        return True
+
+def _yaml_dump_bytes(data: Any) -> bytes:
+    """Render YAML as UTF-8 bytes in one call."""
+    return yaml.dump(data, Dumper=_YamlDumper, default_flow_style=False, encoding='utf-8')
+
+def _write_yaml_atomic(path: Path, data: Any):
+    """Dump YAML to a sibling temp file and rename it over ``path``.
+    
+    Readers see either the old or the new file, never a truncated one.
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(_yaml_dump_bytes(data))
+    os.replace(tmp_path, path)
+
+def _write_json_atomic(path: Path, data: Any):
+    """JSON counterpart of ``_write_yaml_atomic``."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(_json_dumps(data))
+    os.replace(tmp_path, path)
+
+# Parsed YAML files keyed by path, valid while (st_mtime_ns, st_size) is unchanged
+_yaml_cache: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+
+def _load_yaml_cached(path: Path) -> Any:
+    """Parse a YAML file, reusing the previous result while the file is unchanged on disk.
+    
+    Callers get their own deep copy, so configs built from it can be changed
+    without altering the cached parse.
+    """
+    st = path.stat()
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _yaml_cache.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, yaml.load(path.read_bytes(), Loader=_YamlLoader))
+        _yaml_cache[path] = cached
+    return copy.deepcopy(cached[1])
+
+@dataclass(slots=True)
 class ThreatTarget:
     """Individual threat target configuration."""
     name: str
@@ -32,7 +108,7 @@ class ThreatTarget:
         if self.metadata is None:
             self.metadata = {}
 
-@dataclass
+@dataclass(slots=True)
 class IndustryTarget:
     """Industry-specific targeting configuration."""
     industry: str
@@ -45,7 +121,175 @@ class IndustryTarget:
         if self.regulatory_focus is None:
             self.regulatory_focus = []
 
-@dataclass
+# C-level attribute getters for the target filters
+_is_active = attrgetter('active')
+_priority_active = attrgetter('priority', 'active')
+
+def _target_to_dict(target: ThreatTarget) -> Dict[str, Any]:
+    """Serialize a ThreatTarget without asdict's recursive deep copy."""
+    return {
+        "name": target.name,
+        "target_type": target.target_type,
+        "value": target.value,
+        "priority": target.priority,
+        "active": target.active,
+        "tags": target.tags,
+        "metadata": target.metadata
+    }
+
+# Lowercased copies of target fields that older campaign files stored in metadata;
+# match terms are now derived from the live fields, so these are dropped on load
+_LEGACY_DERIVED_METADATA = ("name_lower", "value_lower", "keywords_lower")
+
+def _target_from_dict(data: Dict[str, Any]) -> ThreatTarget:
+    """Build a ThreatTarget from its serialized form, bypassing __init__/__post_init__.
+    
+    tags/metadata are copied so the target never aliases a cached YAML parse.
+    """
+    target = ThreatTarget.__new__(ThreatTarget)
+    target.name = data["name"]
+    target.target_type = data["target_type"]
+    target.value = data["value"]
+    target.priority = data.get("priority", 1)
+    target.active = data.get("active", True)
+    target.tags = list(data.get("tags") or ())
+    target.metadata = dict(data.get("metadata") or ())
+    for key in _LEGACY_DERIVED_METADATA:
+        target.metadata.pop(key, None)
+    return target
+
+def _industry_to_dict(industry: IndustryTarget) -> Dict[str, Any]:
+    """Serialize an IndustryTarget without asdict's recursive deep copy."""
+    return {
+        "industry": industry.industry,
+        "keywords": industry.keywords,
+        "common_domains": industry.common_domains,
+        "threat_vectors": industry.threat_vectors,
+        "regulatory_focus": industry.regulatory_focus
+    }
+
+# Predefined industry threat profiles, written to industry_profiles.yaml on first run
+_DEFAULT_INDUSTRY_PROFILES: Mapping[str, IndustryTarget] = MappingProxyType({
+    "financial_services": IndustryTarget(
+        industry="Financial Services",
+        keywords=[
+            "bank", "banking", "finance", "credit", "loan", "mortgage",
+            "investment", "trading", "insurance", "fintech", "paypal",
+            "visa", "mastercard", "amex", "crypto", "blockchain"
+        ],
+        common_domains=[
+            "bank.com", "bankofamerica.com", "chase.com", "wellsfargo.com",
+            "paypal.com", "stripe.com", "visa.com", "mastercard.com"
+        ],
+        threat_vectors=[
+            "phishing", "business_email_compromise", "credential_harvesting",
+            "fake_banking_sites", "payment_fraud", "crypto_scams"
+        ],
+        regulatory_focus=["PCI-DSS", "SOX", "GDPR", "PSD2"]
+    ),
+    
+    "healthcare": IndustryTarget(
+        industry="Healthcare",
+        keywords=[
+            "hospital", "medical", "health", "patient", "clinic", "pharmacy",
+            "medicare", "medicaid", "insurance", "hipaa", "ehr", "emr"
+        ],
+        common_domains=[
+            "mayo.edu", "clevelandclinic.org", "johnshopkins.edu",
+            "cdc.gov", "nih.gov", "who.int"
+        ],
+        threat_vectors=[
+            "ransomware", "data_theft", "patient_data_breach",
+            "medical_device_attacks", "supply_chain_attacks"
+        ],
+        regulatory_focus=["HIPAA", "HITECH", "FDA", "GDPR"]
+    ),
+    
+    "technology": IndustryTarget(
+        industry="Technology",
+        keywords=[
+            "tech", "software", "cloud", "saas", "api", "developer",
+            "github", "aws", "azure", "google", "microsoft", "apple"
+        ],
+        common_domains=[
+            "microsoft.com", "google.com", "amazon.com", "apple.com",
+            "github.com", "stackoverflow.com", "docker.com"
+        ],
+        threat_vectors=[
+            "supply_chain_attacks", "code_injection", "api_abuse",
+            "insider_threats", "intellectual_property_theft"
+        ],
+        regulatory_focus=["SOC2", "ISO27001", "GDPR", "CCPA"]
+    ),
+    
+    "government": IndustryTarget(
+        industry="Government",
+        keywords=[
+            "gov", "government", "federal", "state", "local", "military",
+            "defense", "embassy", "congress", "senate", "court"
+        ],
+        common_domains=[
+            "whitehouse.gov", "defense.gov", "state.gov", "treasury.gov",
+            "dhs.gov", "fbi.gov", "cia.gov", "nsa.gov"
+        ],
+        threat_vectors=[
+            "nation_state_attacks", "espionage", "election_interference",
+            "critical_infrastructure", "classified_data_theft"
+        ],
+        regulatory_focus=["FISMA", "NIST", "CISA", "FedRAMP"]
+    ),
+    
+    "energy": IndustryTarget(
+        industry="Energy & Utilities",
+        keywords=[
+            "energy", "electric", "power", "utility", "grid", "oil",
+            "gas", "nuclear", "solar", "wind", "renewable", "scada"
+        ],
+        common_domains=[
+            "exxonmobil.com", "chevron.com", "bp.com", "shell.com",
+            "ge.com", "siemens.com", "schneider-electric.com"
+        ],
+        threat_vectors=[
+            "critical_infrastructure_attacks", "scada_attacks",
+            "industrial_espionage", "supply_chain_compromise"
+        ],
+        regulatory_focus=["NERC-CIP", "TSA", "CISA", "ICS-CERT"]
+    ),
+    
+    "retail": IndustryTarget(
+        industry="Retail & E-commerce",
+        keywords=[
+            "retail", "shopping", "ecommerce", "store", "mall", "amazon",
+            "walmart", "target", "costco", "payment", "pos", "checkout"
+        ],
+        common_domains=[
+            "amazon.com", "walmart.com", "target.com", "costco.com",
+            "ebay.com", "etsy.com", "shopify.com", "stripe.com"
+        ],
+        threat_vectors=[
+            "pos_malware", "e-skimming", "payment_fraud",
+            "customer_data_theft", "inventory_manipulation"
+        ],
+        regulatory_focus=["PCI-DSS", "CCPA", "GDPR", "PIPEDA"]
+    )
+})
+
+# Serialized form of the defaults, built once for the first-run YAML dump
+_DEFAULT_INDUSTRY_PROFILES_DICT: Dict[str, Dict[str, Any]] = {
+    key: _industry_to_dict(profile) for key, profile in _DEFAULT_INDUSTRY_PROFILES.items()
+}
+
+@lru_cache(maxsize=8)
+def _load_industry_profiles(path_str: str, mtime_ns: int) -> Mapping[str, IndustryTarget]:
+    """Parse an industry profiles file into IndustryTarget objects.
+    
+    Keyed on the file's mtime so an edited file is re-read; the result is
+    shared by every ThreatTargetingSystem using the same file.
+    """
+    data = yaml.load(Path(path_str).read_bytes(), Loader=_YamlLoader) or {}
+    return MappingProxyType({key: IndustryTarget(**value) for key, value in data.items()})
+
+@dataclass(slots=True)
 class ThreatIntelligenceConfig:
     """Complete threat intelligence targeting configuration."""
     campaign_name: str
@@ -58,6 +302,8 @@ class ThreatIntelligenceConfig:
     active: bool = True
     created_at: str = None
     updated_at: str = None
+    # Bumped on every change made through ThreatTargetingSystem; not serialized
+    _version: int = field(default=0, repr=False, compare=False)
     
     def __post_init__(self):
         if self.created_at is None:
@@ -67,23 +313,23 @@ class ThreatIntelligenceConfig:
     
     def generate_search_filters(self) -> Dict[str, Any]:
         """Generate search filters based on the campaign configuration."""
-        keywords = set()
-        domains = set()
+        # Insertion-ordered dicts dedupe while keeping output stable across calls
+        keywords: Dict[str, None] = {}
+        domains: Dict[str, None] = {}
         
         # Extract keywords and domains from targets
         for target in self.targets:
             if target.target_type == "company":
-                keywords.add(target.name.lower())
-                keywords.add(target.value.lower())
+                keywords[target.name.lower()] = None
+                keywords[target.value.lower()] = None
                 if target.metadata.get("domain"):
-                    domains.add(target.metadata["domain"])
+                    domains[target.metadata["domain"]] = None
             elif target.target_type == "industry":
-                industry_keywords = target.metadata.get("keywords", [])
-                keywords.update([kw.lower() for kw in industry_keywords])
+                keywords.update(dict.fromkeys(kw.lower() for kw in target.metadata.get("keywords", [])))
             elif target.target_type == "domain":
-                domains.add(target.value)
+                domains[target.value] = None
             elif target.target_type in ["url"]:
-                keywords.add(target.value.lower())
+                keywords[target.value.lower()] = None
                 
         return {
             "keywords": list(keywords),
@@ -91,9 +337,31 @@ class ThreatIntelligenceConfig:
             "threat_types": self.threat_types,
             "geographic_focus": self.geographic_focus,
             "confidence_threshold": self.confidence_threshold,
-            "high_priority_targets": [t.value for t in self.targets if t.priority >= 4 and t.active]
+            "high_priority_targets": [
+                t.value for t in self.targets
+                if (priority_active := _priority_active(t))[0] >= 4 and priority_active[1]
+            ]
         }
 
+def _config_to_dict(config: ThreatIntelligenceConfig) -> Dict[str, Any]:
+    """Serialize a campaign configuration for YAML/JSON output.
+    
+    Nested values are shared with the config, not copied; the result is only
+    meant to be dumped.
+    """
+    return {
+        "campaign_name": config.campaign_name,
+        "targets": [_target_to_dict(t) if isinstance(t, ThreatTarget) else t for t in config.targets],
+        "industries": [_industry_to_dict(i) if isinstance(i, IndustryTarget) else i for i in config.industries],
+        "threat_types": config.threat_types,
+        "geographic_focus": config.geographic_focus,
+        "time_range": config.time_range,
+        "confidence_threshold": config.confidence_threshold,
+        "active": config.active,
+        "created_at": config.created_at,
+        "updated_at": config.updated_at
+    }
+
 class ThreatTargetingSystem:
     """Manages threat intelligence targeting and configuration."""
     
@@ -102,149 +370,102 @@ class ThreatTargetingSystem:
             config_dir = os.path.join(os.path.dirname(__file__), "..", "..", "config")
         
         self.config_dir = Path(config_dir)
-        self.config_dir.mkdir(parents=True, exist_ok=True)
+        if not self.config_dir.is_dir():
+            self.config_dir.mkdir(parents=True, exist_ok=True)
         
         self.targets_file = self.config_dir / "threat_targets.yaml"
         self.industries_file = self.config_dir / "industry_profiles.yaml"
         self.campaigns_file = self.config_dir / "campaigns.yaml"
         
+        # Campaign saves are deferred inside batch(); _dirty marks unsaved changes
+        self._autosave = True
+        self._dirty = False
+        # Shared timestamp for every mutation made inside one batch()
+        self._batch_timestamp: Optional[str] = None
+        
+        # current_config.targets grouped by target type, rebuilt on first read after
+        # the campaign version changes; priority, tags and active are read at query time
+        self._by_type: Dict[str, List[ThreatTarget]] = defaultdict(list)
+        self._indexed_version: Optional[int] = None
+        # Keyword/domain sets and keyword automaton derived from the indexed targets
+        self._terms: Optional[Tuple[Tuple[str, ...], Tuple[str, ...], FrozenSet[str]]] = None
+        self._keyword_automaton = None
+        # (_version, summary) of the last campaign summary built
+        self._summary_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        
         # Initialize predefined industry profiles
         self._initialize_industry_profiles()
         
         # Load existing configurations
         self.current_config = self._load_current_config()
     
+    @property
+    def current_config(self) -> Optional[ThreatIntelligenceConfig]:
+        """The active campaign configuration, if any."""
+        return self._current_config
+    
+    @current_config.setter
+    def current_config(self, config: Optional[ThreatIntelligenceConfig]):
+        self._current_config = config
+        self._summary_cache = None
+        self._rebuild_target_index()
+    
+    def _rebuild_target_index(self):
+        """Rebuild the type index from current_config.targets and drop the derived terms."""
+        self._by_type.clear()
+        self._terms = None
+        self._keyword_automaton = None
+        self._indexed_version = None
+        if self._current_config:
+            for target in self._current_config.targets:
+                self._by_type[target.target_type].append(target)
+            self._indexed_version = self._current_config._version
+    
+    def _sync_target_index(self):
+        """Rebuild the type index if the campaign changed since it was built.
+        
+        Every ThreatTargetingSystem mutator bumps the campaign version. Code that
+        appends to current_config.targets or edits a target's type, name, value or
+        metadata in place must call _campaign_changed() afterwards.
+        """
+        if self._indexed_version != self._current_config._version:
+            self._rebuild_target_index()
+    
     def _initialize_industry_profiles(self):
         """Initialize predefined industry threat profiles."""
         
-        industry_profiles = {
-            "financial_services": IndustryTarget(
-                industry="Financial Services",
-                keywords=[
-                    "bank", "banking", "finance", "credit", "loan", "mortgage",
-                    "investment", "trading", "insurance", "fintech", "paypal",
-                    "visa", "mastercard", "amex", "crypto", "blockchain"
-                ],
-                common_domains=[
-                    "bank.com", "bankofamerica.com", "chase.com", "wellsfargo.com",
-                    "paypal.com", "stripe.com", "visa.com", "mastercard.com"
-                ],
-                threat_vectors=[
-                    "phishing", "business_email_compromise", "credential_harvesting",
-                    "fake_banking_sites", "payment_fraud", "crypto_scams"
-                ],
-                regulatory_focus=["PCI-DSS", "SOX", "GDPR", "PSD2"]
-            ),
-            
-            "healthcare": IndustryTarget(
-                industry="Healthcare",
-                keywords=[
-                    "hospital", "medical", "health", "patient", "clinic", "pharmacy",
-                    "medicare", "medicaid", "insurance", "hipaa", "ehr", "emr"
-                ],
-                common_domains=[
-                    "mayo.edu", "clevelandclinic.org", "johnshopkins.edu",
-                    "cdc.gov", "nih.gov", "who.int"
-                ],
-                threat_vectors=[
-                    "ransomware", "data_theft", "patient_data_breach",
-                    "medical_device_attacks", "supply_chain_attacks"
-                ],
-                regulatory_focus=["HIPAA", "HITECH", "FDA", "GDPR"]
-            ),
-            
-            "technology": IndustryTarget(
-                industry="Technology",
-                keywords=[
-                    "tech", "software", "cloud", "saas", "api", "developer",
-                    "github", "aws", "azure", "google", "microsoft", "apple"
-                ],
-                common_domains=[
-                    "microsoft.com", "google.com", "amazon.com", "apple.com",
-                    "github.com", "stackoverflow.com", "docker.com"
-                ],
-                threat_vectors=[
-                    "supply_chain_attacks", "code_injection", "api_abuse",
-                    "insider_threats", "intellectual_property_theft"
-                ],
-                regulatory_focus=["SOC2", "ISO27001", "GDPR", "CCPA"]
-            ),
-            
-            "government": IndustryTarget(
-                industry="Government",
-                keywords=[
-                    "gov", "government", "federal", "state", "local", "military",
-                    "defense", "embassy", "congress", "senate", "court"
-                ],
-                common_domains=[
-                    "whitehouse.gov", "defense.gov", "state.gov", "treasury.gov",
-                    "dhs.gov", "fbi.gov", "cia.gov", "nsa.gov"
-                ],
-                threat_vectors=[
-                    "nation_state_attacks", "espionage", "election_interference",
-                    "critical_infrastructure", "classified_data_theft"
-                ],
-                regulatory_focus=["FISMA", "NIST", "CISA", "FedRAMP"]
-            ),
-            
-            "energy": IndustryTarget(
-                industry="Energy & Utilities",
-                keywords=[
-                    "energy", "electric", "power", "utility", "grid", "oil",
-                    "gas", "nuclear", "solar", "wind", "renewable", "scada"
-                ],
-                common_domains=[
-                    "exxonmobil.com", "chevron.com", "bp.com", "shell.com",
-                    "ge.com", "siemens.com", "schneider-electric.com"
-                ],
-                threat_vectors=[
-                    "critical_infrastructure_attacks", "scada_attacks",
-                    "industrial_espionage", "supply_chain_compromise"
-                ],
-                regulatory_focus=["NERC-CIP", "TSA", "CISA", "ICS-CERT"]
-            ),
-            
-            "retail": IndustryTarget(
-                industry="Retail & E-commerce",
-                keywords=[
-                    "retail", "shopping", "ecommerce", "store", "mall", "amazon",
-                    "walmart", "target", "costco", "payment", "pos", "checkout"
-                ],
-                common_domains=[
-                    "amazon.com", "walmart.com", "target.com", "costco.com",
-                    "ebay.com", "etsy.com", "shopify.com", "stripe.com"
-                ],
-                threat_vectors=[
-                    "pos_malware", "e-skimming", "payment_fraud",
-                    "customer_data_theft", "inventory_manipulation"
-                ],
-                regulatory_focus=["PCI-DSS", "CCPA", "GDPR", "PIPEDA"]
-            )
-        }
-        
-        # Save industry profiles if file doesn't exist
-        if not self.industries_file.exists():
-            with open(self.industries_file, 'w') as f:
-                yaml.dump({k: asdict(v) for k, v in industry_profiles.items()}, f, default_flow_style=False)
+        # Save industry profiles if file doesn't exist; otherwise the on-disk
+        # (possibly user-edited) profiles are loaded on first lookup
+        self._industry_profiles: Optional[Mapping[str, IndustryTarget]] = None
+        try:
+            with open(self.industries_file, 'xb') as f:
+                f.write(_yaml_dump_bytes(_DEFAULT_INDUSTRY_PROFILES_DICT))
+        except FileExistsError:
+            return
+        self._industry_profiles = _DEFAULT_INDUSTRY_PROFILES
     
     def _load_current_config(self) -> Optional[ThreatIntelligenceConfig]:
         """Load current threat intelligence configuration."""
         if self.campaigns_file.exists():
-            with open(self.campaigns_file, 'r') as f:
-                data = yaml.safe_load(f)
-                if data and 'current_campaign' in data:
-                    campaign_data = data['current_campaign']
-                    # Fix: convert dicts to ThreatTarget/IndustryTarget objects
-                    targets = [ThreatTarget(**t) if not isinstance(t, ThreatTarget) else t for t in campaign_data.get('targets', [])]
-                    industries = [IndustryTarget(**i) if not isinstance(i, IndustryTarget) else i for i in campaign_data.get('industries', [])]
-                    campaign_data['targets'] = targets
-                    campaign_data['industries'] = industries
-                    return ThreatIntelligenceConfig(**campaign_data)
+            data = _load_yaml_cached(self.campaigns_file)
+            if data and 'current_campaign' in data:
+                campaign_data = dict(data['current_campaign'])
+                # Fix: convert dicts to ThreatTarget/IndustryTarget objects
+                targets = [_target_from_dict(t) if isinstance(t, dict) else t for t in campaign_data.get('targets', [])]
+                industries = [IndustryTarget(**i) if not isinstance(i, IndustryTarget) else i for i in campaign_data.get('industries', [])]
+                campaign_data['targets'] = targets
+                campaign_data['industries'] = industries
+                return ThreatIntelligenceConfig(**campaign_data)
         return None
     
+    def _now_iso(self) -> str:
+        """Current time as ISO 8601, fixed for the duration of a batch()."""
+        return self._batch_timestamp or datetime.now().isoformat()
+    
     def create_campaign(self, campaign_name: str, description: str = "") -> ThreatIntelligenceConfig:
         """Create a new threat intelligence campaign."""
         
+        now = self._now_iso()
         config = ThreatIntelligenceConfig(
             campaign_name=campaign_name,
             targets=[],
@@ -252,14 +473,15 @@ class ThreatTargetingSystem:
             threat_types=["phishing", "malware", "credential_theft", "data_breach"],
             geographic_focus=["global"],
             time_range={
-                "start": datetime.now().isoformat(),
+                "start": now,
                 "end": None
             },
-            confidence_threshold=0.7
+            confidence_threshold=0.7,
+            created_at=now
         )
         
         self.current_config = config
-        self._save_campaign(config)
+        self._campaign_changed()
         
         return config
     
@@ -268,23 +490,26 @@ class ThreatTargetingSystem:
                           tags: List[str] = None) -> ThreatTarget:
         """Add a company as a threat intelligence target."""
         
+        now = self._now_iso()
+        
+        value = domain or f"{company_name.lower().replace(' ', '')}.com"
         target = ThreatTarget(
             name=company_name,
             target_type="company",
-            value=domain or f"{company_name.lower().replace(' ', '')}.com",
+            value=value,
             priority=priority,
             tags=tags or [],
             metadata={
                 "industry": industry,
                 "domain": domain,
-                "added_date": datetime.now().isoformat()
+                "added_date": now
             }
         )
         
         if self.current_config:
             self.current_config.targets.append(target)
-            self.current_config.updated_at = datetime.now().isoformat()
-            self._save_campaign(self.current_config)
+            self.current_config.updated_at = now
+            self._campaign_changed()
         
         return target
     
@@ -292,8 +517,11 @@ class ThreatTargetingSystem:
                           custom_keywords: List[str] = None) -> ThreatTarget:
         """Add an industry as a threat intelligence target."""
         
+        now = self._now_iso()
+        
         # Load industry profile if it exists
         industry_profile = self._get_industry_profile(industry_name)
+        keywords = custom_keywords or (list(industry_profile.keywords) if industry_profile else [])
         
         target = ThreatTarget(
             name=f"{industry_name} Industry",
@@ -302,17 +530,17 @@ class ThreatTargetingSystem:
             priority=priority,
             tags=["industry"],
             metadata={
-                "keywords": custom_keywords or (industry_profile.keywords if industry_profile else []),
-                "threat_vectors": industry_profile.threat_vectors if industry_profile else [],
-                "regulatory_focus": industry_profile.regulatory_focus if industry_profile else [],
-                "added_date": datetime.now().isoformat()
+                "keywords": keywords,
+                "threat_vectors": list(industry_profile.threat_vectors) if industry_profile else [],
+                "regulatory_focus": list(industry_profile.regulatory_focus) if industry_profile else [],
+                "added_date": now
             }
         )
         
         if self.current_config:
             self.current_config.targets.append(target)
-            self.current_config.updated_at = datetime.now().isoformat()
-            self._save_campaign(self.current_config)
+            self.current_config.updated_at = now
+            self._campaign_changed()
         
         return target
     
@@ -320,6 +548,8 @@ class ThreatTargetingSystem:
                       tags: List[str] = None) -> ThreatTarget:
         """Add a specific URL as a threat intelligence target."""
         
+        now = self._now_iso()
+        
         target = ThreatTarget(
             name=name or f"URL Target: {url}",
             target_type="url",
@@ -328,14 +558,14 @@ class ThreatTargetingSystem:
             tags=tags or ["url"],
             metadata={
                 "url": url,
-                "added_date": datetime.now().isoformat()
+                "added_date": now
             }
         )
         
         if self.current_config:
             self.current_config.targets.append(target)
-            self.current_config.updated_at = datetime.now().isoformat()
-            self._save_campaign(self.current_config)
+            self.current_config.updated_at = now
+            self._campaign_changed()
         
         return target
     
@@ -343,6 +573,8 @@ class ThreatTargetingSystem:
                          tags: List[str] = None) -> ThreatTarget:
         """Add a domain as a threat intelligence target."""
         
+        now = self._now_iso()
+        
         target = ThreatTarget(
             name=name or f"Domain: {domain}",
             target_type="domain",
@@ -351,14 +583,14 @@ class ThreatTargetingSystem:
             tags=tags or ["domain"],
             metadata={
                 "domain": domain,
-                "added_date": datetime.now().isoformat()
+                "added_date": now
             }
         )
         
         if self.current_config:
             self.current_config.targets.append(target)
-            self.current_config.updated_at = datetime.now().isoformat()
-            self._save_campaign(self.current_config)
+            self.current_config.updated_at = now
+            self._campaign_changed()
         
         return target
     
@@ -367,6 +599,8 @@ class ThreatTargetingSystem:
                          metadata: Dict[str, Any] = None) -> ThreatTarget:
         """Add a custom threat intelligence target."""
         
+        now = self._now_iso()
+        
         target = ThreatTarget(
             name=name,
             target_type=target_type,
@@ -375,14 +609,14 @@ class ThreatTargetingSystem:
             tags=tags or [],
             metadata={
                 **(metadata or {}),
-                "added_date": datetime.now().isoformat()
+                "added_date": now
             }
         )
         
         if self.current_config:
             self.current_config.targets.append(target)
-            self.current_config.updated_at = datetime.now().isoformat()
-            self._save_campaign(self.current_config)
+            self.current_config.updated_at = now
+            self._campaign_changed()
         
         return target
     
@@ -390,91 +624,131 @@ class ThreatTargetingSystem:
         """Set the threat types to focus on."""
         if self.current_config:
             self.current_config.threat_types = threat_types
-            self.current_config.updated_at = datetime.now().isoformat()
-            self._save_campaign(self.current_config)
+            self.current_config.updated_at = self._now_iso()
+            self._campaign_changed()
     
     def set_geographic_focus(self, regions: List[str]):
         """Set geographic regions to focus on."""
         if self.current_config:
             self.current_config.geographic_focus = regions
-            self.current_config.updated_at = datetime.now().isoformat()
-            self._save_campaign(self.current_config)
+            self.current_config.updated_at = self._now_iso()
+            self._campaign_changed()
     
     def set_confidence_threshold(self, threshold: float):
         """Set minimum confidence threshold for threat intelligence."""
         if self.current_config:
             self.current_config.confidence_threshold = threshold
-            self.current_config.updated_at = datetime.now().isoformat()
-            self._save_campaign(self.current_config)
+            self.current_config.updated_at = self._now_iso()
+            self._campaign_changed()
+    
+    def _target_terms(self) -> Tuple[Tuple[str, ...], Tuple[str, ...], FrozenSet[str]]:
+        """Return (keywords, domains, keyword set) for the current targets, computed once per target change.
+        
+        Keywords and domains are deduplicated in first-seen order so callers get
+        the same sequence on every call.
+        """
+        self._sync_target_index()
+        if self._terms is not None:
+            return self._terms
+        
+        keywords: Dict[str, None] = {}
+        domains: Dict[str, None] = {}
+        for target in self.current_config.targets:
+            target_type = target.target_type
+            if target_type == "company":
+                keywords[target.name.lower()] = None
+                keywords[target.value.lower()] = None
+                if target.metadata.get("domain"):
+                    domains[target.metadata["domain"]] = None
+            elif target_type == "industry":
+                keywords.update(dict.fromkeys(kw.lower() for kw in target.metadata.get("keywords", [])))
+            elif target_type == "domain":
+                keywords[target.value.lower()] = None
+                domains[target.value] = None
+            elif target_type == "url":
+                keywords[target.value.lower()] = None
+                domain = urlparse(target.value).netloc
+                if domain:
+                    domains[domain] = None
+        
+        self._terms = (tuple(keywords), tuple(domains), frozenset(keywords))
+        return self._terms
     
     def get_target_keywords(self) -> List[str]:
         """Get all keywords for current targets."""
-        keywords = set()
-        
         if not self.current_config:
             return []
         
-        for target in self.current_config.targets:
-            if target.target_type == "company":
-                keywords.add(target.name.lower())
-                keywords.add(target.value.lower())
-            elif target.target_type == "industry":
-                industry_keywords = target.metadata.get("keywords", [])
-                keywords.update([kw.lower() for kw in industry_keywords])
-            elif target.target_type in ["url", "domain"]:
-                keywords.add(target.value.lower())
-        
-        return list(keywords)
+        return list(self._target_terms()[0])
     
     def get_target_domains(self) -> List[str]:
         """Get all domains for current targets."""
-        domains = set()
-        
         if not self.current_config:
             return []
         
-        for target in self.current_config.targets:
-            if target.target_type == "company" and target.metadata.get("domain"):
-                domains.add(target.metadata["domain"])
-            elif target.target_type == "domain":
-                domains.add(target.value)
-            elif target.target_type == "url":
-                from urllib.parse import urlparse
-                domain = urlparse(target.value).netloc
-                if domain:
-                    domains.add(domain)
+        return list(self._target_terms()[1])
+    
+    def get_keyword_set(self) -> FrozenSet[str]:
+        """Get the lowercased target keywords as a frozenset for O(1) membership tests."""
+        if not self.current_config:
+            return frozenset()
         
-        return list(domains)
+        return self._target_terms()[2]
+    
+    def get_keyword_automaton(self):
+        """Get an Aho-Corasick automaton over the target keywords.
+        
+        ``automaton.iter(text.lower())`` yields ``(end_index, keyword)`` for every
+        keyword occurring in ``text`` in a single pass. Returns None when
+        pyahocorasick is not installed or there are no keywords.
+        """
+        if not AHOCORASICK_AVAILABLE:
+            return None
+        if self._keyword_automaton is None:
+            keywords = self.get_keyword_set()
+            if not keywords:
+                return None
+            automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._keyword_automaton = automaton
+        return self._keyword_automaton
     
     def get_high_priority_targets(self) -> List[ThreatTarget]:
         """Get targets with priority 4 or 5."""
         if not self.current_config:
             return []
         
-        return [t for t in self.current_config.targets if t.priority >= 4 and t.active]
+        return [
+            t for t in self.current_config.targets
+            if (priority_active := _priority_active(t))[0] >= 4 and priority_active[1]
+        ]
     
     def get_targets_by_type(self, target_type: str) -> List[ThreatTarget]:
         """Get targets by type (company, industry, url, domain, custom)."""
         if not self.current_config:
             return []
         
-        return [t for t in self.current_config.targets if t.target_type == target_type and t.active]
+        self._sync_target_index()
+        return list(filter(_is_active, self._by_type.get(target_type, ())))
     
     def get_targets_by_tag(self, tag: str) -> List[ThreatTarget]:
         """Get targets by tag."""
         if not self.current_config:
             return []
         
-        return [t for t in self.current_config.targets if tag in t.tags and t.active]
+        return [t for t in self.current_config.targets if t.active and tag in t.tags]
     
     def generate_search_filters(self) -> Dict[str, Any]:
         """Generate search filters for threat intelligence gathering."""
         if not self.current_config:
             return {}
         
+        keywords, domains, _ = self._target_terms()
         return {
-            "keywords": self.get_target_keywords(),
-            "domains": self.get_target_domains(),
+            "keywords": list(keywords),
+            "domains": list(domains),
             "threat_types": self.current_config.threat_types,
             "geographic_focus": self.current_config.geographic_focus,
             "confidence_threshold": self.current_config.confidence_threshold,
@@ -483,62 +757,114 @@ class ThreatTargetingSystem:
     
     def _get_industry_profile(self, industry_name: str) -> Optional[IndustryTarget]:
         """Get industry profile by name."""
+        if self._industry_profiles is None:
+            if not self.industries_file.is_file():
+                return None
+            self._industry_profiles = _load_industry_profiles(
+                str(self.industries_file), self.industries_file.stat().st_mtime_ns
+            )
+        
+        return self._industry_profiles.get(industry_name.lower())
+    
+    def _campaign_changed(self):
+        """Record a campaign change, saving immediately unless inside batch()."""
+        self.current_config._version += 1
+        self._dirty = True
+        if self._autosave:
+            self._save_campaign(self.current_config)
+    
+    def flush(self):
+        """Write pending campaign changes to disk."""
+        if self._dirty and self.current_config:
+            self._save_campaign(self.current_config)
+    
+    @contextmanager
+    def batch(self) -> Iterator["ThreatTargetingSystem"]:
+        """Group several mutations into a single campaign write.
+        
+        Example:
+            with targeting.batch():
+                for domain in domains:
+                    targeting.add_domain_target(domain)
+        """
+        previous = self._autosave
+        self._autosave = False
+        if previous:
+            self._batch_timestamp = datetime.now().isoformat()
         try:
-            with open(self.industries_file, 'r') as f:
-                data = yaml.safe_load(f)
-                if industry_name.lower() in data:
-                    return IndustryTarget(**data[industry_name.lower()])
-        except FileNotFoundError:
-            pass
-        return None
+            yield self
+        finally:
+            self._autosave = previous
+            if previous:
+                self._batch_timestamp = None
+                self.flush()
     
     def _save_campaign(self, config: ThreatIntelligenceConfig):
         """Save campaign configuration to file."""
         campaign_data = {
-            "current_campaign": asdict(config),
-            "last_updated": datetime.now().isoformat()
+            "current_campaign": _config_to_dict(config),
+            "last_updated": self._now_iso()
         }
         
-        with open(self.campaigns_file, 'w') as f:
-            yaml.dump(campaign_data, f, default_flow_style=False)
+        _write_yaml_atomic(self.campaigns_file, campaign_data)
+        _yaml_cache.pop(self.campaigns_file, None)
+        self._dirty = False
     
     def export_config(self, filepath: str = None) -> str:
         """Export current configuration to JSON/YAML file."""
         if not self.current_config:
             raise ValueError("No active campaign to export")
         
-        campaign_data = asdict(self.current_config)
+        campaign_data = _config_to_dict(self.current_config)
         if filepath is None:
-            filepath = save_campaign_file(self.current_config.campaign_name, campaign_data)
+            filepath = generate_campaign_filename(self.current_config.campaign_name)
+        if str(filepath).endswith('.json'):
+            _write_json_atomic(Path(filepath), campaign_data)
         else:
-            with open(filepath, 'w') as f:
-                yaml.dump(campaign_data, f, default_flow_style=False)
+            _write_yaml_atomic(Path(filepath), campaign_data)
         
         return filepath
     
     def import_config(self, filepath: str) -> ThreatIntelligenceConfig:
         """Import configuration from file."""
-        with open(filepath, 'r') as f:
-            if filepath.endswith('.json'):
-                data = json.load(f)
-            else:
-                data = yaml.safe_load(f)
+        if str(filepath).endswith('.json'):
+            data = _json_loads(Path(filepath).read_bytes())
+        else:
+            data = yaml.load(Path(filepath).read_bytes(), Loader=_YamlLoader)
         
+        data = dict(data)
+        data['targets'] = [_target_from_dict(t) if isinstance(t, dict) else t for t in data.get('targets', [])]
+        data['industries'] = [IndustryTarget(**i) if not isinstance(i, IndustryTarget) else i for i in data.get('industries', [])]
         config = ThreatIntelligenceConfig(**data)
         self.current_config = config
-        self._save_campaign(config)
+        self._campaign_changed()
         
         return config
     
     def get_campaign_summary(self) -> Dict[str, Any]:
-        """Get summary of current campaign."""
+        """Get summary of current campaign.
+        
+        The summary is cached until the campaign version changes. Changes made
+        through this class bump it; code that edits targets in place (for example
+        ``target.active = False``) must call _campaign_changed() afterwards.
+        """
         if not self.current_config:
             return {"status": "no_active_campaign"}
         
+        key = self.current_config._version
+        if self._summary_cache is None or self._summary_cache[0] != key:
+            self._summary_cache = (key, self._build_campaign_summary())
+        
+        # Copies, so callers editing their summary do not change the cached one
+        summary = self._summary_cache[1]
+        return {**summary, "target_breakdown": dict(summary["target_breakdown"])}
+    
+    def _build_campaign_summary(self) -> Dict[str, Any]:
+        """Compute the campaign summary returned by get_campaign_summary."""
         return {
             "campaign_name": self.current_config.campaign_name,
             "total_targets": len(self.current_config.targets),
-            "active_targets": len([t for t in self.current_config.targets if t.active]),
+            "active_targets": sum(map(_is_active, self.current_config.targets)),
             "target_breakdown": {
                 "companies": len(self.get_targets_by_type("company")),
                 "industries": len(self.get_targets_by_type("industry")),
@@ -558,28 +884,27 @@ class ThreatTargetingSystem:
         """List all campaigns with summary info."""
         if not self.campaigns_file.exists():
             return {}
-        with open(self.campaigns_file, 'r') as f:
-            data = yaml.safe_load(f)
-            if not data or 'campaigns' not in data:
-                return {}
-            return data['campaigns']
+        data = _load_yaml_cached(self.campaigns_file)
+        if not data or 'campaigns' not in data:
+            return {}
+        return dict(data['campaigns'])
 
     def get_campaign_config(self, campaign_id: str) -> ThreatIntelligenceConfig:
         """Get the configuration for a specific campaign by ID."""
         if not self.campaigns_file.exists():
             raise ValueError("No campaigns file found.")
-        with open(self.campaigns_file, 'r') as f:
-            data = yaml.safe_load(f)
-            if not data or 'campaigns' not in data:
-                raise ValueError("No campaigns found.")
-            campaign = data['campaigns'].get(campaign_id)
-            if not campaign:
-                raise ValueError(f"Campaign {campaign_id} not found.")
-            targets = [ThreatTarget(**t) if not isinstance(t, ThreatTarget) else t for t in campaign.get('targets', [])]
-            industries = [IndustryTarget(**i) if not isinstance(i, IndustryTarget) else i for i in campaign.get('industries', [])]
-            campaign['targets'] = targets
-            campaign['industries'] = industries
-            return ThreatIntelligenceConfig(**campaign)
+        data = _load_yaml_cached(self.campaigns_file)
+        if not data or 'campaigns' not in data:
+            raise ValueError("No campaigns found.")
+        campaign = data['campaigns'].get(campaign_id)
+        if not campaign:
+            raise ValueError(f"Campaign {campaign_id} not found.")
+        campaign = dict(campaign)
+        targets = [_target_from_dict(t) if isinstance(t, dict) else t for t in campaign.get('targets', [])]
+        industries = [IndustryTarget(**i) if not isinstance(i, IndustryTarget) else i for i in campaign.get('industries', [])]
+        campaign['targets'] = targets
+        campaign['industries'] = industries
+        return ThreatIntelligenceConfig(**campaign)
 
 # Global targeting system instance
 _targeting_system = None
@@ -625,21 +950,20 @@ if __name__ == "__main__":
 
     if args.enrich and args.campaign_file:
         # Load minimal campaign
-        with open(args.campaign_file, 'r') as f:
-            data = yaml.safe_load(f)
+        data = yaml.load(Path(args.campaign_file).read_bytes(), Loader=_YamlLoader)
         # Get targeting system
         targeting = get_targeting_system()
-        # Create enriched config
-        config = targeting.create_campaign(data.get("company_name") or data.get("campaign_name", "Untitled Campaign"))
-        # Optionally add domains, industry, threat_types from minimal file
-        if "domains" in data:
-            for domain in data["domains"]:
-                targeting.add_domain_target(domain)
-        if "industry" in data and data["industry"]:
-            targeting.add_industry_target(data["industry"])
-        if "threat_types" in data and data["threat_types"]:
-            targeting.set_threat_types(data["threat_types"])
+        with targeting.batch():
+            # Create enriched config
+            config = targeting.create_campaign(data.get("company_name") or data.get("campaign_name", "Untitled Campaign"))
+            # Optionally add domains, industry, threat_types from minimal file
+            if "domains" in data:
+                for domain in data["domains"]:
+                    targeting.add_domain_target(domain)
+            if "industry" in data and data["industry"]:
+                targeting.add_industry_target(data["industry"])
+            if "threat_types" in data and data["threat_types"]:
+                targeting.set_threat_types(data["threat_types"])
         # Save enriched config to same file
-        with open(args.campaign_file, 'w') as f:
-            yaml.dump(asdict(targeting.current_config), f, default_flow_style=False)
+        _write_yaml_atomic(Path(args.campaign_file), _config_to_dict(targeting.current_config))
         print(f"✅ Enriched campaign file: {args.campaign_file}")
@@ -12,19 +12,18 @@ This version includes:
 """
 import os
 import sys
+import time
 import asyncio
 import logging
+import importlib.util
+from string import Template
+from functools import lru_cache, cached_property
 from pathlib import Path
-from dotenv import load_dotenv
 from datetime import datetime
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-# Load environment variables
-env_path = Path(__file__).parent.parent.parent / '.env'
-load_dotenv(env_path)
-
 # Import threat targeting system
 from threatcrew.config.threat_targeting import get_targeting_system, ThreatIntelligenceConfig
 
@@ -35,67 +34,162 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-print("🚀 ThreatAgent v2.0 - Enhanced Threat Intelligence System")
-print("=" * 60)
-print(f"🔧 Using Ollama at: {os.getenv('OLLAMA_API_BASE', 'http://localhost:11434')}")
-print(f"🤖 Using model: {os.getenv('MODEL', 'threat-intelligence')}")
-print(f"📅 Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print("=" * 60)
+
+# Environment loading and the startup banner happen once, from the entry points
+# rather than at import, so `--help` and library imports skip them. The public
+# workflow functions and ThreatAgentSystem also call the idempotent _load_env, so
+# callers that import them directly still get MODEL / OLLAMA_API_BASE.
+@lru_cache(maxsize=1)
+def _load_env():
+    """Load environment variables from the project .env file."""
+    from dotenv import load_dotenv
+    env_path = Path(__file__).parent.parent.parent / '.env'
+    load_dotenv(env_path)
+
+
+@lru_cache(maxsize=1)
+def _print_banner():
+    """Print the startup banner."""
+    rule = "=" * 60
+    sys.stdout.write(
+        "🚀 ThreatAgent v2.0 - Enhanced Threat Intelligence System\n"
+        f"{rule}\n"
+        f"🔧 Using Ollama at: {os.getenv('OLLAMA_API_BASE', 'http://localhost:11434')}\n"
+        f"🤖 Using model: {os.getenv('MODEL', 'threat-intelligence')}\n"
+        f"📅 Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        f"{rule}\n"
+    )
+
+
+# A successful LLM connection probe is reused for this many seconds
+LLM_PROBE_TTL = 60
+
+
+@lru_cache(maxsize=1)
+def _probe_llm(ttl_bucket: int) -> str:
+    """Send a one-line test prompt to the LLM; memoized per TTL window, failures are not cached."""
+    from threatcrew.crew import get_llm
+    response = get_llm().invoke("Respond with 'OK' if you can read this.")
+    # Chat backends return a message object rather than a string
+    return getattr(response, 'content', response).strip()
+
+
+# Report skeletons, parsed once at import and filled per workflow run
+_SIMPLE_REPORT_TEMPLATE = Template("""
+# Threat Intelligence Report - ${title_domain}
+
+## Summary
+- **Threat Type**: Phishing Campaign
+- **Risk Level**: HIGH
+- **IOCs Found**: ${n_iocs}
+
+## Indicators
+${indicators_block}
+
+## Recommendations
+1. Block domains at DNS level
+2. Monitor for similar patterns
+3. Update security awareness training
+        """)
+
+_ENHANCED_REPORT_TEMPLATE = Template("""
+# Enhanced Threat Intelligence Report
+
+## Executive Summary
+- **Campaign Type**: Financial Phishing
+- **Risk Level**: HIGH
+- **IOCs Identified**: ${n_iocs}
+- **TTPs Mapped**: ${n_ttps}
+
+## Threat Indicators
+${indicators_block}
+
+## MITRE ATT&CK Mapping
+${ttps_block}
+
+## Recommendations
+1. Block domains at DNS/proxy level
+2. Update email security filters
+3. Enhance user awareness training
+4. Monitor for similar domain patterns
+5. Implement additional web filtering rules
+
+## Confidence Assessment
+- Overall Confidence: 85%
+- Classification Accuracy: 90%
+- TTP Mapping Confidence: 80%
+""")
+
+# Lookalike-domain patterns generated for company and domain targets
+_COMPANY_TEMPLATES = (
+    "secure-{0}.net",
+    "login-{0}.com",
+    "{0}-alert.org",
+    "verify-{0}.info"
+)
+_DOMAIN_TEMPLATES = (
+    "secure-{0}.net",
+    "{0}-security.com",
+    "verify-{0}.org"
+)
+# Industry-themed phishing domains generated for industry targets
+_INDUSTRY_DOMAINS = {
+    "financial_services": (
+        "secure-banking-alert.net",
+        "bank-security-update.com",
+        "financial-verification.org"
+    ),
+    "healthcare": (
+        "medical-records-update.net",
+        "healthcare-portal.com",
+        "patient-security.org"
+    ),
+    "technology": (
+        "cloud-security-alert.net",
+        "tech-support-update.com",
+        "software-verification.org"
+    ),
+}
+# Drops spaces and dots when turning a company name into a domain label
+_COMPANY_NAME_TABLE = str.maketrans("", "", " .")
 
 
 def generate_targeted_domains(targeting_config: ThreatIntelligenceConfig):
     """Generate suspicious domains based on targeting configuration"""
+    # Only target type and value shape the output, so priority/tag edits still hit the cache
+    signature = tuple((target.target_type, target.value) for target in targeting_config.targets)
+    return list(_generate_domains_for_signature(signature))
+
+
+@lru_cache(maxsize=128)
+def _generate_domains_for_signature(signature: tuple) -> tuple:
+    """Build the suspicious domains for a ((target_type, value), ...) signature."""
     domains = []
     
     # Generate domains for company targets
-    for target in targeting_config.targets:
-        if target.target_type == "company":
-            company_name = target.value.lower().replace(" ", "").replace(".", "")
-            domains.extend([
-                f"secure-{company_name}.net",
-                f"login-{company_name}.com",
-                f"{company_name}-alert.org",
-                f"verify-{company_name}.info"
-            ])
-        elif target.target_type == "domain":
+    for target_type, value in signature:
+        if target_type == "company":
+            company_name = value.lower().translate(_COMPANY_NAME_TABLE)
+            domains.extend([template.format(company_name) for template in _COMPANY_TEMPLATES])
+        elif target_type == "domain":
             # Generate variations of legitimate domains
-            base_domain = target.value.split('.')[0]
-            domains.extend([
-                f"secure-{base_domain}.net",
-                f"{base_domain}-security.com",
-                f"verify-{base_domain}.org"
-            ])
-        elif target.target_type == "industry":
+            base_domain = value.split('.')[0]
+            domains.extend([template.format(base_domain) for template in _DOMAIN_TEMPLATES])
+        elif target_type == "industry":
             # Generate industry-specific phishing domains
-            if target.value == "financial_services":
-                domains.extend([
-                    "secure-banking-alert.net",
-                    "bank-security-update.com",
-                    "financial-verification.org"
-                ])
-            elif target.value == "healthcare":
-                domains.extend([
-                    "medical-records-update.net",
-                    "healthcare-portal.com",
-                    "patient-security.org"
-                ])
-            elif target.value == "technology":
-                domains.extend([
-                    "cloud-security-alert.net",
-                    "tech-support-update.com",
-                    "software-verification.org"
-                ])
+            domains.extend(_INDUSTRY_DOMAINS.get(value, ()))
     
     # Limit to reasonable number for demo
-    return domains[:5] if domains else [
+    return tuple(domains[:5]) if domains else (
         "generic-phishing.com",
         "suspicious-domain.net",
         "threat-example.org"
-    ]
+    )
 
 
 def run_simple_workflow(targeting_config: ThreatIntelligenceConfig = None):
     """Run simplified threat intelligence workflow with optional targeting"""
+    _load_env()
     
     print("\n" + "="*60)
     print("🕵️  THREAT INTELLIGENCE AUTOMATION SYSTEM (Simplified)")
@@ -104,10 +198,8 @@ def run_simple_workflow(targeting_config: ThreatIntelligenceConfig = None):
     try:
         # Test LLM connection
         print("\n🔌 Testing LLM connection...")
-        from threatcrew.crew import get_llm
-        llm = get_llm()
-        test_response = llm.invoke("Respond with 'OK' if you can read this.")
-        print(f"✅ LLM Response: {test_response.strip()}")
+        test_response = _probe_llm(int(time.time() // LLM_PROBE_TTL))
+        print(f"✅ LLM Response: {test_response}")
         
         # Display targeting configuration if provided
         if targeting_config:
@@ -171,22 +263,11 @@ def run_simple_workflow(targeting_config: ThreatIntelligenceConfig = None):
         # Step 4: Generate Report
         print("\n📝 STEP 4: Report Generation")
         print("-" * 30)
-        report = f"""
-# Threat Intelligence Report - {domains[0]}
-
-## Summary
-- **Threat Type**: Phishing Campaign
-- **Risk Level**: HIGH
-- **IOCs Found**: {len(domains)}
-
-## Indicators
-{chr(10).join([f'- {d}' for d in domains])}
-
-## Recommendations
-1. Block domains at DNS level
-2. Monitor for similar patterns
-3. Update security awareness training
-        """
+        report = _SIMPLE_REPORT_TEMPLATE.substitute(
+            title_domain=domains[0],
+            n_iocs=len(domains),
+            indicators_block="\n".join(f"- {d}" for d in domains)
+        )
         print("✅ Report generated successfully")
         
         print("\n" + "="*60)
@@ -207,6 +288,7 @@ def run_simple_workflow(targeting_config: ThreatIntelligenceConfig = None):
 
 def run_crew_workflow(targeting_config: ThreatIntelligenceConfig = None):
     """Attempt to run the full crew workflow with optional targeting"""
+    _load_env()
     print("\n🚀 Attempting full CrewAI workflow...")
     
     try:
@@ -221,9 +303,9 @@ def run_crew_workflow(targeting_config: ThreatIntelligenceConfig = None):
             # Ensure the current_config of the system is the one we are working with.
             # This is important if run_crew_workflow is called with a specific config
             # that might not be the global `current_config` yet.
-            # In the `targeted` flow, `create_campaign` already sets it, but this ensures robustness.
-            if targeting_system.current_config is None or \
-               targeting_system.current_config.campaign_name != targeting_config.campaign_name:
+            # In the `targeted` flow, `create_campaign` already sets it, so the
+            # identity check short-circuits without rebuilding the target indexes.
+            if targeting_system.current_config is not targeting_config:
                 targeting_system.current_config = targeting_config # Set the system's current campaign
 
             search_filters = targeting_system.generate_search_filters() # Now call on the system instance
@@ -248,6 +330,8 @@ def run_crew_workflow(targeting_config: ThreatIntelligenceConfig = None):
 
 def run(targeting_config: ThreatIntelligenceConfig = None):
     """Main entry point with fallback strategy and optional targeting"""
+    _load_env()
+    _print_banner()
     try:
         # Try simple workflow first (more reliable)
         return run_simple_workflow(targeting_config)
@@ -265,53 +349,64 @@ class ThreatAgentSystem:
     """Main class to manage ThreatAgent operations."""
     
     def __init__(self, enhanced_mode: bool = True):
+        _load_env()
         self.enhanced_mode = enhanced_mode
         self.targeting_system = get_targeting_system()
         self.current_campaign_config: ThreatIntelligenceConfig = None
+        # Set once the enhanced workflow fails, so later runs go straight to the
+        # simplified workflow instead of failing the same way again
+        self._enhanced_failed = False
         
         if self.enhanced_mode:
             self.initialize_system()
     
     def initialize_system(self):
-        """Initialize all system components."""
-        try:
-            # Import enhanced components
-            from .managers import (
-                get_threat_feed_manager,
-                get_continuous_learning_manager,
-                get_crewai_training_manager
-            )
-            from .tools.memory_system import get_memory
-            from .tools.finetuning_system import ThreatFineTuner
-            from .crew import crew, get_crew_performance_summary
-            
-            self.memory = get_memory()
-            self.feed_manager = get_threat_feed_manager()
-            self.learning_manager = get_continuous_learning_manager()
-            self.training_manager = get_crewai_training_manager()
-            self.finetuner = ThreatFineTuner()
-            self.crew = crew
-            
-            logger.info("✅ All system components initialized successfully")
-            
-        except ImportError as e:
-            logger.warning(f"⚠️  Enhanced components not available: {e}")
+        """Check the enhanced components are installed; each is imported on first use."""
+        if importlib.util.find_spec("crewai") is None:
+            logger.warning("⚠️  Enhanced components not available: crewai is not installed")
             logger.info("🔄 Falling back to simplified workflow")
             self.enhanced_mode = False
-        except Exception as e:
-            logger.error(f"❌ System initialization error: {e}")
-            self.enhanced_mode = False
+    
+    @cached_property
+    def memory(self):
+        from .tools.memory_system import get_memory
+        return get_memory()
+    
+    @cached_property
+    def feed_manager(self):
+        from .managers import get_threat_feed_manager
+        return get_threat_feed_manager()
+    
+    @cached_property
+    def learning_manager(self):
+        from .managers import get_continuous_learning_manager
+        return get_continuous_learning_manager()
+    
+    @cached_property
+    def training_manager(self):
+        from .managers import get_crewai_training_manager
+        return get_crewai_training_manager()
+    
+    @cached_property
+    def finetuner(self):
+        from .tools.finetuning_system import ThreatFineTuner
+        return ThreatFineTuner()
+    
+    @cached_property
+    def crew(self):
+        from .crew import crew
+        return crew
     
     async def run_enhanced_workflow(self, inputs: dict = None):
         """Run the enhanced memory-aware CrewAI workflow."""
         logger.info("🚀 Starting enhanced CrewAI workflow...")
         
+        if not self.enhanced_mode or self._enhanced_failed:
+            return await self.run_simplified_workflow()
+        
         try:
-            if not self.enhanced_mode:
-                return await self.run_simplified_workflow()
-            
             # Check system status first
-            self.check_system_status()
+            await self.acheck_system_status()
             
             # Execute enhanced crew workflow
             result = self.crew.kickoff(inputs=inputs or {})
@@ -321,9 +416,14 @@ class ThreatAgentSystem:
             
         except Exception as e:
             logger.error(f"❌ Enhanced workflow error: {e}")
-            logger.info("🔄 Falling back to simplified workflow")
+            logger.info("🔄 Falling back to simplified workflow until the mode is reset")
+            self._enhanced_failed = True
             return await self.run_simplified_workflow()
     
+    def reset_mode(self):
+        """Let the next run retry the enhanced workflow after a failure."""
+        self._enhanced_failed = False
+    
     async def run_simplified_workflow(self):
         """Run simplified workflow for compatibility."""
         logger.info("🔄 Running simplified compatibility workflow...")
@@ -356,33 +456,12 @@ class ThreatAgentSystem:
         logger.info(f"🎯 Step 3: TTP Mapping - Mapped to {len(ttps)} MITRE techniques")
         
         # Generate report
-        report = f"""
-# Enhanced Threat Intelligence Report
-
-## Executive Summary
-- **Campaign Type**: Financial Phishing
-- **Risk Level**: HIGH
-- **IOCs Identified**: {len(domains)}
-- **TTPs Mapped**: {len(ttps)}
-
-## Threat Indicators
-{chr(10).join([f'- {d}' for d in domains])}
-
-## MITRE ATT&CK Mapping
-{chr(10).join([f'- {ttp}' for ttp in ttps])}
-
-## Recommendations
-1. Block domains at DNS/proxy level
-2. Update email security filters
-3. Enhance user awareness training
-4. Monitor for similar domain patterns
-5. Implement additional web filtering rules
-
-## Confidence Assessment
-- Overall Confidence: 85%
-- Classification Accuracy: 90%
-- TTP Mapping Confidence: 80%
-"""
+        report = _ENHANCED_REPORT_TEMPLATE.substitute(
+            n_iocs=len(domains),
+            n_ttps=len(ttps),
+            indicators_block="\n".join(f"- {d}" for d in domains),
+            ttps_block="\n".join(f"- {ttp}" for ttp in ttps)
+        )
         
         logger.info("📝 Step 4: Report Generation - Comprehensive report created")
         
@@ -398,6 +477,10 @@ class ThreatAgentSystem:
     
     def check_system_status(self):
         """Check and display system component status."""
+        asyncio.run(self.acheck_system_status())
+    
+    async def acheck_system_status(self):
+        """Check and display system component status, querying components concurrently."""
         if not self.enhanced_mode:
             logger.info("🔧 Running in simplified mode")
             return
@@ -405,21 +488,26 @@ class ThreatAgentSystem:
         logger.info("🔍 Checking system component status...")
         
         try:
+            from threatcrew.crew import get_crew_performance_summary
+            
+            # The component queries are independent DB/in-memory reads
+            memory_stats, learning_status, feed_stats, performance = await asyncio.gather(
+                asyncio.to_thread(self.memory.get_statistics),
+                asyncio.to_thread(self.learning_manager.get_learning_status),
+                asyncio.to_thread(self.feed_manager.get_feed_stats),
+                asyncio.to_thread(get_crew_performance_summary)
+            )
+            
             # Memory system status
-            memory_stats = self.memory.get_statistics()
             logger.info(f"💾 Memory: {memory_stats['total_iocs']} IOCs, {memory_stats['total_analyses']} analyses")
             
             # Learning system status
-            learning_status = self.learning_manager.get_learning_status()
             logger.info(f"🧠 Learning: Model {learning_status['current_model_version']}")
             
             # Feed manager status
-            feed_stats = self.feed_manager.get_feed_stats()
             logger.info(f"📡 Feeds: {feed_stats['active_feeds']}/{feed_stats['total_feeds']} active")
             
             # Performance tracking
-            from threatcrew.crew import get_crew_performance_summary
-            performance = get_crew_performance_summary()
             if performance.get('crew_metrics'):
                 metrics = performance['crew_metrics']
                 logger.info(f"📈 Performance: {metrics.get('success_rate', 0):.1%} success rate")
@@ -427,6 +515,19 @@ class ThreatAgentSystem:
         except Exception as e:
             logger.warning(f"⚠️  Status check failed: {e}")
 
+# Static console banners, emitted with a single write each
+_INTERACTIVE_BANNER = (
+    "\n🎯 ThreatAgent v2.0 Interactive Mode\n"
+    "Available commands:\n"
+    "  1. run - Execute threat intelligence workflow\n"
+    "  2. status - Show system status\n"
+    "  3. train - Trigger manual training\n"
+    "  4. summary - Show system summary\n"
+    "  5. quit - Exit the system\n"
+    + "-" * 40 + "\n"
+)
+_BATCH_RESULTS_HEADER = "\n📊 BATCH EXECUTION RESULTS\n" + "=" * 40 + "\n"
+
 async def run_interactive_mode():
     """Run ThreatAgent in interactive mode."""
     system = ThreatAgentSystem()
@@ -454,18 +555,21 @@ async def run_interactive_mode():
         system.current_campaign_config = system.targeting_system.get_campaign_config("default_general_threats")
         print(f"ℹ️ Created and loaded default campaign: {system.current_campaign_config.campaign_name}")
 
-    print("\n🎯 ThreatAgent v2.0 Interactive Mode")
-    print("Available commands:")
-    print("  1. run - Execute threat intelligence workflow")
-    print("  2. status - Show system status") 
-    print("  3. train - Trigger manual training")
-    print("  4. summary - Show system summary")
-    print("  5. quit - Exit the system")
-    print("-" * 40)
+    sys.stdout.write(_INTERACTIVE_BANNER)
+    sys.stdout.flush()
+    
+    # With INTERACTIVE_FEED_SYNC=true, feeds keep syncing in the background while
+    # the prompt waits for input (each new IOC costs an LLM classification)
+    feed_task = None
+    if system.enhanced_mode and os.getenv('INTERACTIVE_FEED_SYNC', 'false').lower() == 'true':
+        try:
+            feed_task = asyncio.create_task(system.feed_manager.start_feed_monitoring())
+        except Exception as e:
+            logger.warning(f"⚠️  Background feed sync not started: {e}")
     
     try:
         while True:
-            command = input("\n🤖 ThreatAgent> ").strip().lower()
+            command = (await asyncio.to_thread(input, "\n🤖 ThreatAgent> ")).strip().lower()
             
             if command in ['quit', 'exit', 'q']:
                 print("👋 Shutting down ThreatAgent...")
@@ -482,7 +586,12 @@ async def run_interactive_mode():
                     print("\n📋 No active campaign. Use 'target' command to set one.")
             elif command == "status":
                 print("📊 Checking system status...")
-                system.check_system_status()
+                await system.acheck_system_status()
+                if system._enhanced_failed:
+                    print("⚠️  Enhanced workflow failed earlier; runs use the simplified workflow. Type 'reset' to retry it.")
+            elif command == "reset":
+                system.reset_mode()
+                print("🔄 The next run will retry the enhanced workflow")
             elif command == "train":
                 if system.enhanced_mode:
                     print("🔧 Starting manual training...")
@@ -507,7 +616,7 @@ async def run_interactive_mode():
                 else:
                     print("⚠️  Campaign name not provided. Usage: target <campaign_name>")
             elif command in ['help', 'h']:
-                print("Available commands: run, status, train, summary, quit")
+                print("Available commands: run, status, reset, train, summary, quit")
                 
             else:
                 print(f"❓ Unknown command: {command}. Type 'help' for available commands.")
@@ -516,6 +625,10 @@ async def run_interactive_mode():
         print("\n\n⏹️  ThreatAgent interrupted by user")
     except Exception as e:
         print(f"\n❌ Interactive mode error: {e}")
+    finally:
+        if feed_task is not None:
+            system.feed_manager.running = False
+            feed_task.cancel()
 
 async def run_batch_mode():
     """Run ThreatAgent in batch mode."""
@@ -528,10 +641,11 @@ async def run_batch_mode():
         # Run enhanced workflow
         result = await system.run_enhanced_workflow()
         
-        print("\n📊 BATCH EXECUTION RESULTS")
-        print("=" * 40)
-        print(f"Status: {result.get('status', 'unknown')}")
-        print(f"Mode: {result.get('mode', 'enhanced')}")
+        sys.stdout.write(
+            f"{_BATCH_RESULTS_HEADER}"
+            f"Status: {result.get('status', 'unknown')}\n"
+            f"Mode: {result.get('mode', 'enhanced')}\n"
+        )
         
         if result.get('domains'):
             print(f"IOCs Found: {len(result['domains'])}")
@@ -574,6 +688,8 @@ def run_enhanced_main():
 # Enhanced main function with backward compatibility
 def main():
     """Main entry point with enhanced features and backward compatibility."""
+    _load_env()
+    _print_banner()
     try:
         # Try enhanced mode first
         if '--enhanced' in sys.argv or '--interactive' in sys.argv or '-i' in sys.argv:
@@ -604,6 +720,8 @@ if __name__ == "__main__":
         help="Command to execute (default: interactive)"
     )
     args = parser.parse_args()
+    _load_env()
+    _print_banner()
 
     # Instantiate ThreatAgentSystem here to make agent_system available
     agent_system = ThreatAgentSystem()
@@ -9,16 +9,298 @@ Automatically generates training data and triggers fine-tuning based on performa
 import asyncio
 import json
 import logging
+import re
+import sqlite3
+import threading
 import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
 from ..tools.memory_system import get_memory
-from ..tools.finetuning_system import ThreatFineTuner
+from ..tools.finetuning_system import ThreatFineTuner, DEFAULT_BASE_MODEL
+
+# orjson decodes stored analysis rows several times faster than stdlib json
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# Optional JIT for the error-rate count kernels
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Keywords in an input that a LOW/UNKNOWN classification may have missed
+# (substring matches, so 'phish' also flags 'phishing')
+_SUSPICIOUS_KEYWORDS = frozenset({'phish', 'malware', 'exploit', 'attack', 'threat', 'suspicious'})
+_SUSPICIOUS_RE = re.compile('|'.join(map(re.escape, sorted(_SUSPICIOUS_KEYWORDS))), re.IGNORECASE)
+
+# Classification pattern feature -> input substrings (matched against lowercased text)
+_FINANCIAL_KEYWORDS = frozenset({'phish', 'banking'})
+_SUSPICIOUS_TLDS = frozenset({'.tk', '.ml', '.ga'})
+_FEATURE_KEYWORDS = {
+    'financial_keywords': _FINANCIAL_KEYWORDS,
+    'suspicious_tld': _SUSPICIOUS_TLDS,
+}
+
+# Feature names in bit order: bit i of a row's features_mask is _FEATURES[i]
+_FEATURES = tuple(_FEATURE_KEYWORDS)
+
+
+def _feature_terms_sql(text: str) -> List[str]:
+    """One SQL term per feature: its bit when any of its keywords occur in `text`, else 0."""
+    terms = []
+    for bit, feature in enumerate(_FEATURES):
+        matches = ' OR '.join(f"instr({text}, '{keyword}')" for keyword in sorted(_FEATURE_KEYWORDS[feature]))
+        terms.append(f"(CASE WHEN {matches} THEN {1 << bit} ELSE 0 END)")
+    return terms
+
+
+def _group_features_mask_sql(text: str) -> str:
+    """Aggregate SQL expression: the OR of the features masks over a group's rows."""
+    return ' + '.join(f"MAX({term})" for term in _feature_terms_sql(text))
+
+
+def _features_from_mask(mask: int) -> List[str]:
+    """Feature names set in a features_mask."""
+    return [feature for bit, feature in enumerate(_FEATURES) if mask >> bit & 1]
+
+# Applied once to the manager's long-lived connection: WAL so the learning loop's
+# reads never block ingest writes, a 256 MB mmap window and a 64 MB page cache
+_CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',
+)
+
+# Lowercased input text of a stored analysis: the decoded string for JSON string
+# inputs, the raw text for non-JSON inputs, NULL for JSON objects and arrays.
+# risk_level and category are generated columns over output_data (see memory_system).
+_INPUT_TEXT_SQL = '''lower(CASE WHEN NOT json_valid(input_data) THEN input_data
+                           WHEN json_type(input_data) = 'text' THEN json_extract(input_data, '$') END)'''
+
+_COUNT_RECENT_SQL = 'SELECT COUNT(*) FROM analysis_history WHERE created_at_epoch >= ?'
+
+# High-confidence classifications of a window grouped by (risk level, category),
+# keeping groups with at least the given number of samples
+_CLASSIFICATION_GROUPS_SQL = f'''
+    SELECT risk_level, category,
+           COUNT(*) AS sample_count,
+           AVG(confidence) AS avg_confidence,
+           {_group_features_mask_sql('input_text')} AS features_mask
+    FROM (
+        SELECT COALESCE(risk_level, 'UNKNOWN') AS risk_level,
+               COALESCE(category, 'unknown') AS category,
+               confidence,
+               {_INPUT_TEXT_SQL} AS input_text
+        FROM analysis_history
+        WHERE analysis_type = 'ioc_classification' AND created_at_epoch >= ? AND confidence > 0.8
+    )
+    GROUP BY risk_level, category
+    HAVING COUNT(*) >= ?
+'''
+
+# Evaluation aggregates computed by SQLite: (total, sum confidence, sum processing time, high-confidence count)
+_PERFORMANCE_AGGREGATES_SQL = '''
+    SELECT COUNT(*), SUM(COALESCE(confidence, 0)), SUM(COALESCE(processing_time, 0)),
+           SUM(CASE WHEN confidence > 0.8 THEN 1 ELSE 0 END)
+    FROM analysis_history
+    WHERE created_at_epoch >= ?
+'''
+
+# (classification count, low-confidence HIGH/CRITICAL count) for the false positive estimate
+_FALSE_POSITIVE_SQL = '''
+    SELECT COUNT(*),
+           SUM(CASE WHEN COALESCE(confidence, 0) < 0.6 AND risk_level IN ('HIGH', 'CRITICAL')
+                    THEN 1 ELSE 0 END)
+    FROM analysis_history
+    WHERE analysis_type = 'ioc_classification' AND created_at_epoch >= ?
+'''
+
+# Text inputs of high-confidence LOW/UNKNOWN classifications, the false negative candidates
+_FALSE_NEGATIVE_CANDIDATES_SQL = f'''
+    SELECT {_INPUT_TEXT_SQL}
+    FROM analysis_history
+    WHERE analysis_type = 'ioc_classification' AND created_at_epoch >= ?
+      AND confidence > 0.8 AND COALESCE(risk_level, 'UNKNOWN') IN ('LOW', 'UNKNOWN')
+'''
+
+def _rollup_terms_sql(row: str) -> Tuple[str, ...]:
+    """Per-row rollup contributions of the analysis_history row aliased `row`.
+    
+    Returns (hour bucket, count, confidence, processing time, high confidence,
+    classification, potential false positive, potential false negative), mirroring
+    _PERFORMANCE_AGGREGATES_SQL and the error-rate estimators.
+    """
+    input_text = (f"CASE WHEN NOT json_valid({row}.input_data) THEN {row}.input_data "
+                  f"WHEN json_type({row}.input_data) = 'text' THEN json_extract({row}.input_data, '$') END")
+    suspicious = ' OR '.join(f"{input_text} LIKE '%{keyword}%'" for keyword in sorted(_SUSPICIOUS_KEYWORDS))
+    classification = f"{row}.analysis_type = 'ioc_classification'"
+    return (
+        f"{row}.created_at_epoch / 3600",
+        "1",
+        f"COALESCE({row}.confidence, 0)",
+        f"COALESCE({row}.processing_time, 0)",
+        f"CASE WHEN {row}.confidence > 0.8 THEN 1 ELSE 0 END",
+        f"CASE WHEN {classification} THEN 1 ELSE 0 END",
+        f"CASE WHEN {classification} AND COALESCE({row}.confidence, 0) < 0.6 "
+        f"AND {row}.risk_level IN ('HIGH', 'CRITICAL') THEN 1 ELSE 0 END",
+        f"CASE WHEN {classification} AND {row}.confidence > 0.8 "
+        f"AND COALESCE({row}.risk_level, 'UNKNOWN') IN ('LOW', 'UNKNOWN') AND ({suspicious}) THEN 1 ELSE 0 END",
+    )
+
+_ROLLUP_COLUMNS = ('hour_bucket', 'cnt', 'sum_conf', 'sum_pt', 'high_conf', 'cls_cnt', 'fp_cnt', 'fn_cnt')
+
+
+def _rollup_upsert_sql(row: str, sign: str = '') -> str:
+    """Statement adding (sign '') or subtracting (sign '-') row `row` in its hour bucket."""
+    bucket, *terms = _rollup_terms_sql(row)
+    return f'''
+        INSERT INTO analysis_rollup ({', '.join(_ROLLUP_COLUMNS)})
+        SELECT {bucket}, {', '.join(f'{sign}({term})' for term in terms)}
+        WHERE {row}.created_at_epoch IS NOT NULL
+        ON CONFLICT(hour_bucket) DO UPDATE SET
+            {', '.join(f'{column} = {column} + excluded.{column}' for column in _ROLLUP_COLUMNS[1:])};
+    '''
+
+_ROLLUP_TRIGGERS = ('trg_analysis_rollup', 'trg_analysis_rollup_delete', 'trg_analysis_rollup_update')
+
+# Hourly evaluation aggregates kept current by triggers on analysis_history
+# (inserts add a row, deletes subtract it, updates move it), so a 24 hour
+# evaluation reads ~25 rows instead of scanning the window
+_ROLLUP_SCHEMA_SQL = (
+    '''
+    CREATE TABLE analysis_rollup (
+        hour_bucket INTEGER PRIMARY KEY,
+        cnt INTEGER NOT NULL DEFAULT 0,
+        sum_conf REAL NOT NULL DEFAULT 0,
+        sum_pt REAL NOT NULL DEFAULT 0,
+        high_conf INTEGER NOT NULL DEFAULT 0,
+        cls_cnt INTEGER NOT NULL DEFAULT 0,
+        fp_cnt INTEGER NOT NULL DEFAULT 0,
+        fn_cnt INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    f'''
+    CREATE TRIGGER trg_analysis_rollup AFTER INSERT ON analysis_history
+    BEGIN {_rollup_upsert_sql('NEW')} END
+    ''',
+    f'''
+    CREATE TRIGGER trg_analysis_rollup_delete AFTER DELETE ON analysis_history
+    BEGIN {_rollup_upsert_sql('OLD', '-')} END
+    ''',
+    f'''
+    CREATE TRIGGER trg_analysis_rollup_update
+    AFTER UPDATE OF analysis_type, input_data, output_data, confidence, processing_time, created_at ON analysis_history
+    BEGIN {_rollup_upsert_sql('OLD', '-')} {_rollup_upsert_sql('NEW')} END
+    ''',
+    f'''
+    INSERT INTO analysis_rollup ({', '.join(_ROLLUP_COLUMNS)})
+    SELECT {_rollup_terms_sql('h')[0]}, {', '.join(f'SUM({term})' for term in _rollup_terms_sql('h')[1:])}
+    FROM analysis_history AS h
+    WHERE h.created_at_epoch IS NOT NULL
+    GROUP BY 1
+    ''',
+)
+
+# (total, sum confidence, sum processing time, high confidence, classifications, potential FPs, potential FNs)
+_ROLLUP_AGGREGATES_SQL = '''
+    SELECT SUM(cnt), SUM(sum_conf), SUM(sum_pt), SUM(high_conf), SUM(cls_cnt), SUM(fp_cnt), SUM(fn_cnt)
+    FROM analysis_rollup
+    WHERE hour_bucket >= ?
+'''
+
+# Model performance entries evicted from the in-memory history
+_MODEL_PERFORMANCE_SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS model_performance (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        model_version TEXT NOT NULL,
+        accuracy REAL,
+        confidence REAL,
+        processing_time REAL,
+        false_positive_rate REAL,
+        false_negative_rate REAL,
+        training_data_size INTEGER,
+        improvements TEXT,
+        recorded_at TIMESTAMP
+    )
+'''
+
+# Ordinal risk codes for the NumPy error-rate path. A missing risk level counts as
+# UNKNOWN (as COALESCE does in SQL); unrecognised values get -1 and match neither check.
+_RISK_CODES = {'UNKNOWN': 0, 'LOW': 1, 'MEDIUM': 2, 'HIGH': 3, 'CRITICAL': 4}
+_RISK_HIGH = _RISK_CODES['HIGH']
+_RISK_LOW = _RISK_CODES['LOW']
+
+
+def _risk_code(output: Any) -> int:
+    """Ordinal risk code of a decoded analysis output."""
+    risk_level = output.get('risk_level') if isinstance(output, dict) else None
+    return _RISK_CODES.get(risk_level or 'UNKNOWN', -1)
+
+
+def _count_false_positives_numpy(confidence: np.ndarray, risk: np.ndarray) -> int:
+    """Count low-confidence HIGH/CRITICAL classifications."""
+    return int(np.count_nonzero((confidence < 0.6) & (risk >= _RISK_HIGH)))
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _count_false_positives(confidence, risk):
+        """Count low-confidence HIGH/CRITICAL classifications (branchless JIT loop)."""
+        count = 0
+        for i in range(confidence.size):
+            count += (confidence[i] < 0.6) & (risk[i] >= 3)
+        return count
+else:
+    _count_false_positives = _count_false_positives_numpy
+
+# Raw classification rows for the NumPy error-rate path used when SQLite lacks JSON1
+_CLASSIFICATION_ROWS_SQL = '''
+    SELECT COALESCE(confidence, 0), input_data, output_data
+    FROM analysis_history
+    WHERE analysis_type = 'ioc_classification' AND created_at_epoch >= ?
+'''
+
+
+# Window predicate used in place of `created_at_epoch >= ?` when the generated
+# column is missing (SQLite older than 3.31); takes the same unix-time parameter
+_EPOCH_WINDOW_SQL = 'created_at_epoch >= ?'
+_CREATED_AT_WINDOW_SQL = "created_at >= datetime(?, 'unixepoch')"
+
+
+def _epoch_cutoff(hours: float) -> int:
+    """Unix time `hours` ago, compared against analysis_history.created_at_epoch."""
+    return int(time.time() - hours * 3600)
+
+
+def _sqlite_has_json1(conn: sqlite3.Connection) -> bool:
+    """Check whether the SQLite library behind `conn` provides the JSON1 functions."""
+    try:
+        conn.execute("SELECT json_valid('{}')")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _decode_json(text: Optional[str]) -> Any:
+    """Decode a stored JSON column, returning non-JSON text unchanged."""
+    if not text:
+        return None
+    try:
+        return json_loads(text)
+    except (TypeError, ValueError):
+        return text
+
 @dataclass
 class LearningMetrics:
     accuracy: float
@@ -41,6 +323,14 @@ class ContinuousLearningManager:
     Monitors performance, generates training data, and triggers model updates.
     """
     
+    # Training events kept in memory; older ones are archived to model_performance
+    PERFORMANCE_HISTORY_SIZE = 256
+    
+    # Seconds between evaluations: starts at 6 hours and adapts to the analysis volume
+    EVALUATION_INTERVAL = 6 * 3600
+    MIN_EVALUATION_INTERVAL = 3600
+    MAX_EVALUATION_INTERVAL = 24 * 3600
+    
     def __init__(self, learning_threshold: float = 0.1, min_training_samples: int = 100):
         self.memory = get_memory()
         self.finetuner = ThreatFineTuner()
@@ -48,8 +338,19 @@ class ContinuousLearningManager:
         self.min_training_samples = min_training_samples
         self.running = False
         self.current_model_version = "1.0"
-        self.performance_history: List[ModelPerformance] = []
+        self.performance_history: Deque[ModelPerformance] = deque(maxlen=self.PERFORMANCE_HISTORY_SIZE)
         self.last_training_time = None
+        self.evaluation_interval = self.EVALUATION_INTERVAL
+        # Analyses in the last evaluated window; drives the evaluation interval
+        self._last_window_size = 0
+        # Set to cut the current wait short (after retraining, or on stop)
+        self._wake_event = asyncio.Event()
+        # Long-lived tuned connection to the memory DB, opened on first use
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.RLock()
+        self._json1_available = True
+        self._epoch_column_available = True
+        self._rollup_available = False
         
     async def start_continuous_learning(self):
         """Start the continuous learning process."""
@@ -69,20 +370,51 @@ class ContinuousLearningManager:
                 # Update knowledge patterns
                 await self._update_knowledge_patterns()
                 
-                # Sleep for evaluation interval (e.g., every 6 hours)
-                await asyncio.sleep(6 * 3600)
+                # Let SQLite refresh planner statistics where they have drifted
+                self._optimize_database()
+                
+                # Sleep for the evaluation interval, adapted to the last window's volume
+                await self._wait_for_next_evaluation(self._next_evaluation_interval())
                 
             except Exception as e:
                 logger.error(f"❌ Error in continuous learning: {e}")
-                await asyncio.sleep(3600)  # Retry in 1 hour
+                await self._wait_for_next_evaluation(3600)  # Retry in 1 hour
+    
+    def _next_evaluation_interval(self) -> int:
+        """Back off while windows are nearly empty, speed up while they are saturated."""
+        if self._last_window_size < self.min_training_samples / 10:
+            self.evaluation_interval = min(self.evaluation_interval * 2, self.MAX_EVALUATION_INTERVAL)
+        elif self._last_window_size > self.min_training_samples:
+            self.evaluation_interval = max(self.evaluation_interval // 2, self.MIN_EVALUATION_INTERVAL)
+        return self.evaluation_interval
+    
+    async def _wait_for_next_evaluation(self, seconds: float):
+        """Sleep up to `seconds`, returning early when the wake event is set."""
+        try:
+            await asyncio.wait_for(self._wake_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wake_event.clear()
     
     async def _evaluate_current_performance(self) -> LearningMetrics:
         """Evaluate the current model performance."""
         try:
-            # Get recent analysis results
-            recent_analyses = self._get_recent_analyses(hours=24)
-            
-            if not recent_analyses:
+            # Aggregate the last 24 hours in SQL rather than loading every row. The window
+            # starts on an hour boundary, so it spans 24 to 25 hours and the rollup (whole
+            # hour buckets) and the scan count exactly the same rows
+            since = _epoch_cutoff(24) // 3600 * 3600
+            with self._conn_lock:
+                conn = self._get_connection()
+                if self._rollup_available:
+                    total_analyses, total_confidence, total_processing_time, high_confidence_count, \
+                        classification_count, potential_fps, potential_fns = \
+                        conn.execute(_ROLLUP_AGGREGATES_SQL, (since // 3600,)).fetchone()
+                else:
+                    total_analyses, total_confidence, total_processing_time, high_confidence_count = \
+                        conn.execute(self._window_sql(_PERFORMANCE_AGGREGATES_SQL), (since,)).fetchone()
+            
+            self._last_window_size = total_analyses or 0
+            if not total_analyses:
                 logger.warning("⚠️  No recent analyses found for performance evaluation")
                 return LearningMetrics(
                     accuracy=0.0,
@@ -93,23 +425,20 @@ class ContinuousLearningManager:
                     timestamp=datetime.now()
                 )
             
-            # Calculate metrics
-            total_analyses = len(recent_analyses)
-            total_confidence = sum(analysis.get('confidence', 0) for analysis in recent_analyses)
-            total_processing_time = sum(analysis.get('processing_time', 0) for analysis in recent_analyses)
-            
             # Estimate accuracy based on confidence and feedback
-            high_confidence_analyses = [a for a in recent_analyses if a.get('confidence', 0) > 0.8]
-            estimated_accuracy = len(high_confidence_analyses) / total_analyses if total_analyses > 0 else 0
+            estimated_accuracy = high_confidence_count / total_analyses
             
             # Calculate false positive/negative rates (simplified estimation)
-            fp_rate = self._estimate_false_positive_rate(recent_analyses)
-            fn_rate = self._estimate_false_negative_rate(recent_analyses)
+            if self._rollup_available:
+                fp_rate = potential_fps / classification_count if classification_count else 0.0
+                fn_rate = potential_fns / classification_count if classification_count else 0.0
+            else:
+                fp_rate, fn_rate = self._estimate_error_rates(since)
             
             metrics = LearningMetrics(
                 accuracy=estimated_accuracy,
-                confidence=total_confidence / total_analyses if total_analyses > 0 else 0,
-                processing_time=total_processing_time / total_analyses if total_analyses > 0 else 0,
+                confidence=total_confidence / total_analyses,
+                processing_time=total_processing_time / total_analyses,
                 false_positive_rate=fp_rate,
                 false_negative_rate=fn_rate,
                 timestamp=datetime.now()
@@ -124,116 +453,150 @@ class ContinuousLearningManager:
             logger.error(f"❌ Error evaluating performance: {e}")
             return LearningMetrics(0, 0, 0, 0, 0, datetime.now())
     
-    def _get_recent_analyses(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """Get recent analysis results from memory."""
-        import sqlite3
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return the manager's long-lived connection, opening and tuning it on first use."""
+        with self._conn_lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.memory.db_path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                for pragma in _CONNECTION_PRAGMAS:
+                    conn.execute(pragma)
+                conn.execute(_MODEL_PERFORMANCE_SCHEMA_SQL)
+                self._conn = conn
+                self._json1_available = _sqlite_has_json1(conn)
+                self._epoch_column_available = any(
+                    row[1] == 'created_at_epoch' for row in conn.execute('PRAGMA table_xinfo(analysis_history)')
+                )
+                self._rollup_available = (
+                    self._json1_available and self._epoch_column_available and self._ensure_rollup(conn)
+                )
+            return self._conn
+    
+    def _window_sql(self, sql: str) -> str:
+        """Adapt a time-window query to databases without the created_at_epoch column."""
+        if self._epoch_column_available:
+            return sql
+        return sql.replace(_EPOCH_WINDOW_SQL, _CREATED_AT_WINDOW_SQL)
+    
+    def _ensure_rollup(self, conn: sqlite3.Connection) -> bool:
+        """Create and backfill the analysis_rollup table and triggers if any are missing."""
+        try:
+            placeholders = ', '.join('?' * len(_ROLLUP_TRIGGERS))
+            existing = conn.execute(
+                f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+                _ROLLUP_TRIGGERS
+            ).fetchone()[0]
+            if existing == len(_ROLLUP_TRIGGERS):
+                return True
+            
+            # Table, triggers and backfill in one write transaction so no write is missed or counted twice
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for trigger in _ROLLUP_TRIGGERS:
+                    conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                conn.execute('DROP TABLE IF EXISTS analysis_rollup')
+                for statement in _ROLLUP_SCHEMA_SQL:
+                    conn.execute(statement)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️  Analysis rollup unavailable, evaluating by scan: {e}")
+            return False
+    
+    def _optimize_database(self, full: bool = False):
+        """Run PRAGMA optimize, or a full ANALYZE of analysis_history when `full` is set."""
+        try:
+            with self._conn_lock:
+                self._get_connection().execute('ANALYZE analysis_history' if full else 'PRAGMA optimize')
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️  Database optimization failed: {e}")
+    
+    def _count_recent_analyses(self, hours: int) -> int:
+        """Count analyses from the last `hours` hours without fetching them."""
+        with self._conn_lock:
+            conn = self._get_connection()
+            return conn.execute(self._window_sql(_COUNT_RECENT_SQL), (_epoch_cutoff(hours),)).fetchone()[0]
+    
+    def _estimate_error_rates(self, since: int) -> Tuple[float, float]:
+        """Estimate (false positive rate, false negative rate) since the given unix time."""
+        with self._conn_lock:
+            self._get_connection()
+            json1_available = self._json1_available
+        if not json1_available:
+            return self._estimate_error_rates_numpy(since)
+        return self._estimate_false_positive_rate(since), self._estimate_false_negative_rate(since)
+    
+    def _estimate_error_rates_numpy(self, since: int) -> Tuple[float, float]:
+        """Vectorised error-rate estimate over raw rows, for SQLite builds without JSON1."""
+        with self._conn_lock:
+            conn = self._get_connection()
+            rows = conn.execute(self._window_sql(_CLASSIFICATION_ROWS_SQL), (since,)).fetchall()
+        if not rows:
+            return 0.0, 0.0
         
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        confidence = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+        risk = np.fromiter((_risk_code(_decode_json(row[2])) for row in rows), dtype=np.int8, count=len(rows))
         
-        with sqlite3.connect(self.memory.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT analysis_type, input_data, output_data, confidence, processing_time, created_at
-                FROM analysis_history 
-                WHERE created_at >= ? 
-                ORDER BY created_at DESC
-            ''', (cutoff_time.isoformat(),))
-            
-            analyses = []
-            for row in cursor.fetchall():
-                analysis_type, input_data, output_data, confidence, processing_time, created_at = row
-                analyses.append({
-                    'analysis_type': analysis_type,
-                    'input_data': json.loads(input_data) if input_data else {},
-                    'output_data': json.loads(output_data) if output_data else {},
-                    'confidence': confidence or 0,
-                    'processing_time': processing_time or 0,
-                    'created_at': created_at
-                })
-            
-            return analyses
+        potential_fps = int(_count_false_positives(confidence, risk))
+        fn_candidates = np.flatnonzero((confidence > 0.8) & (risk >= 0) & (risk <= _RISK_LOW))
+        potential_fns = sum(
+            1 for i in fn_candidates if self._has_suspicious_patterns(_decode_json(rows[i][1]))
+        )
+        return potential_fps / len(rows), potential_fns / len(rows)
     
-    def _estimate_false_positive_rate(self, analyses: List[Dict[str, Any]]) -> float:
-        """Estimate false positive rate based on analysis patterns."""
+    def _estimate_false_positive_rate(self, since: int) -> float:
+        """Estimate false positive rate based on analysis patterns since the given unix time."""
         # Simplified estimation - in production, this would use feedback data
-        classification_analyses = [a for a in analyses if a['analysis_type'] == 'ioc_classification']
-        if not classification_analyses:
-            return 0.0
-        
-        # Look for patterns that might indicate false positives
-        # E.g., low confidence classifications that were marked as high risk
-        potential_fps = 0
-        for analysis in classification_analyses:
-            output = analysis.get('output_data', {})
-            if isinstance(output, str):
-                try:
-                    output = json.loads(output)
-                except:
-                    continue
-            
-            confidence = analysis.get('confidence', 0)
-            risk_level = output.get('risk_level', 'UNKNOWN')
-            
-            # If low confidence but high risk, might be false positive
-            if confidence < 0.6 and risk_level in ['HIGH', 'CRITICAL']:
-                potential_fps += 1
+        # Low confidence classifications that were marked as high risk might be false positives
+        with self._conn_lock:
+            conn = self._get_connection()
+            total, potential_fps = conn.execute(self._window_sql(_FALSE_POSITIVE_SQL), (since,)).fetchone()
         
-        return potential_fps / len(classification_analyses) if classification_analyses else 0.0
+        return potential_fps / total if total else 0.0
     
-    def _estimate_false_negative_rate(self, analyses: List[Dict[str, Any]]) -> float:
-        """Estimate false negative rate based on analysis patterns."""
+    def _estimate_false_negative_rate(self, since: int) -> float:
+        """Estimate false negative rate based on analysis patterns since the given unix time."""
         # Simplified estimation - in production, this would use feedback data
-        classification_analyses = [a for a in analyses if a['analysis_type'] == 'ioc_classification']
-        if not classification_analyses:
-            return 0.0
+        # High confidence classifications marked as low risk whose input shows
+        # suspicious patterns might be false negatives
+        with self._conn_lock:
+            conn = self._get_connection()
+            total = conn.execute(self._window_sql(
+                "SELECT COUNT(*) FROM analysis_history WHERE analysis_type = 'ioc_classification' AND created_at_epoch >= ?"
+            ), (since,)).fetchone()[0]
+            if not total:
+                return 0.0
+            candidates = conn.execute(self._window_sql(_FALSE_NEGATIVE_CANDIDATES_SQL), (since,)).fetchall()
         
-        # Look for patterns that might indicate false negatives
-        # E.g., high confidence classifications marked as low risk but showing suspicious patterns
-        potential_fns = 0
-        for analysis in classification_analyses:
-            output = analysis.get('output_data', {})
-            if isinstance(output, str):
-                try:
-                    output = json.loads(output)
-                except:
-                    continue
-            
-            confidence = analysis.get('confidence', 0)
-            risk_level = output.get('risk_level', 'UNKNOWN')
-            
-            # If high confidence but low risk, but input shows suspicious patterns
-            if confidence > 0.8 and risk_level in ['LOW', 'UNKNOWN']:
-                input_data = analysis.get('input_data', {})
-                if self._has_suspicious_patterns(input_data):
-                    potential_fns += 1
-        
-        return potential_fns / len(classification_analyses) if classification_analyses else 0.0
+        potential_fns = sum(1 for (input_text,) in candidates if self._has_suspicious_patterns(input_text))
+        return potential_fns / total
     
     def _has_suspicious_patterns(self, input_data: Dict[str, Any]) -> bool:
         """Check if input data has suspicious patterns that might indicate false negative."""
         # Simplified pattern detection
         if isinstance(input_data, str):
-            text = input_data.lower()
-            suspicious_keywords = ['phish', 'malware', 'exploit', 'attack', 'threat', 'suspicious']
-            return any(keyword in text for keyword in suspicious_keywords)
+            return _SUSPICIOUS_RE.search(input_data) is not None
         return False
     
     def _should_retrain(self, current_metrics: LearningMetrics) -> bool:
         """Determine if the model should be retrained based on performance."""
-        if not self.performance_history:
-            return False
-        
-        # Check if we have enough new training data
-        new_analyses_count = len(self._get_recent_analyses(hours=24))
-        if new_analyses_count < self.min_training_samples:
-            return False
-        
+        # Cheapest checks first: the database is only consulted when they pass
         # Check if enough time has passed since last training (minimum 1 week)
         if self.last_training_time:
             time_since_training = datetime.now() - self.last_training_time
             if time_since_training < timedelta(days=7):
                 return False
         
+        if not self.performance_history:
+            return False
+        
+        # Check if we have enough new training data
+        if self._count_recent_analyses(hours=24) < self.min_training_samples:
+            return False
+        
         # Compare with baseline performance
         baseline_metrics = self.performance_history[-1].metrics
         
@@ -263,7 +626,7 @@ class ContinuousLearningManager:
             logger.info("🔄 Starting model retraining process...")
             
             # Generate new training dataset
-            dataset_path = self.finetuner.generate_training_dataset()
+            dataset_path, training_data_size = self.finetuner.generate_training_dataset_with_count()
             
             # Create enhanced training configuration
             training_config = self.finetuner.create_training_configuration(
@@ -276,7 +639,7 @@ class ContinuousLearningManager:
             
             # Generate Ollama Modelfile for the new version
             modelfile_path = self.finetuner.generate_ollama_modelfile(
-                base_model="llama3",
+                base_model=DEFAULT_BASE_MODEL,
                 dataset_path=dataset_path,
                 model_name=training_config["model_name"]
             )
@@ -290,10 +653,14 @@ class ContinuousLearningManager:
             self.last_training_time = datetime.now()
             
             # Store performance improvement
-            self._record_training_event(dataset_path, training_config)
+            await asyncio.to_thread(self._record_training_event, training_data_size, training_config)
+            self._optimize_database(full=True)
             
             logger.info("✅ Retraining completed successfully")
             
+            # Evaluate the new model version without waiting out the interval
+            self._wake_event.set()
+            
         except Exception as e:
             logger.error(f"❌ Error during retraining: {e}")
     
@@ -310,16 +677,8 @@ class ContinuousLearningManager:
         except:
             return "2.0"
     
-    def _record_training_event(self, dataset_path: str, training_config: Dict[str, Any]):
+    def _record_training_event(self, training_data_size: int, training_config: Dict[str, Any]):
         """Record a training event in the performance history."""
-        # Calculate training data size
-        training_data_size = 0
-        try:
-            with open(dataset_path, 'r') as f:
-                training_data_size = sum(1 for line in f)
-        except:
-            pass
-        
         # Create dummy metrics for new model (will be updated after evaluation)
         metrics = LearningMetrics(
             accuracy=0.0,
@@ -337,118 +696,92 @@ class ContinuousLearningManager:
             improvements={}
         )
         
+        self._append_performance(performance)
+    
+    def _append_performance(self, performance: ModelPerformance):
+        """Append to the performance history, archiving the entry the deque is about to evict."""
+        if len(self.performance_history) == self.performance_history.maxlen:
+            self._archive_performance(self.performance_history[0])
         self.performance_history.append(performance)
     
+    def _archive_performance(self, performance: ModelPerformance):
+        """Persist a performance entry to the model_performance table."""
+        metrics = performance.metrics
+        try:
+            with self._conn_lock:
+                conn = self._get_connection()
+                with conn:
+                    conn.execute('''
+                        INSERT INTO model_performance (model_version, accuracy, confidence, processing_time,
+                                                       false_positive_rate, false_negative_rate,
+                                                       training_data_size, improvements, recorded_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (performance.model_version, metrics.accuracy, metrics.confidence, metrics.processing_time,
+                          metrics.false_positive_rate, metrics.false_negative_rate, performance.training_data_size,
+                          json.dumps(performance.improvements), metrics.timestamp.isoformat()))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️  Could not archive performance entry {performance.model_version}: {e}")
+    
+    def _count_archived_performance(self) -> int:
+        """Count performance entries archived out of the in-memory history."""
+        try:
+            with self._conn_lock:
+                return self._get_connection().execute('SELECT COUNT(*) FROM model_performance').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+    
     async def _update_knowledge_patterns(self):
         """Update knowledge patterns based on recent successful analyses."""
         try:
-            # Get high-confidence analyses from the last week
-            successful_analyses = self._get_successful_analyses(days=7)
-            
-            if not successful_analyses:
-                return
-            
-            # Extract patterns from successful analyses
-            patterns = self._extract_knowledge_patterns(successful_analyses)
-            
-            # Store patterns in memory
-            for pattern in patterns:
-                self.memory.store_knowledge_pattern(
-                    pattern_type=pattern['type'],
-                    pattern_text=pattern['text'],
-                    pattern_rules=json.dumps(pattern['rules']),
-                    effectiveness_score=pattern['score']
-                )
-            
-            logger.info(f"📚 Updated {len(patterns)} knowledge patterns")
+            # Reading the week and committing the batch run on a worker thread,
+            # leaving the event loop free meanwhile
+            await asyncio.to_thread(self._update_knowledge_patterns_sync)
             
         except Exception as e:
             logger.error(f"❌ Error updating knowledge patterns: {e}")
     
-    def _get_successful_analyses(self, days: int = 7) -> List[Dict[str, Any]]:
-        """Get successful analyses from the specified time period."""
-        cutoff_time = datetime.now() - timedelta(days=days)
+    def _update_knowledge_patterns_sync(self):
+        """Extract and store knowledge patterns from the last week's successful analyses."""
+        # Extract patterns from high-confidence analyses of the last week
+        patterns = self._extract_knowledge_patterns(days=7)
         
-        analyses = self._get_recent_analyses(hours=days * 24)
+        if not patterns:
+            return
         
-        # Filter for high-confidence analyses
-        successful = [
-            analysis for analysis in analyses 
-            if analysis.get('confidence', 0) > 0.8
-        ]
+        # Store patterns in memory (one transaction for the whole batch)
+        self.memory.store_knowledge_patterns_bulk(patterns)
         
-        return successful
+        logger.info(f"📚 Updated {len(patterns)} knowledge patterns")
     
-    def _extract_knowledge_patterns(self, analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Extract reusable knowledge patterns from successful analyses."""
+    def _extract_knowledge_patterns(self, days: int = 7) -> List[Dict[str, Any]]:
+        """Extract reusable knowledge patterns from successful analyses of the last `days` days."""
         patterns = []
-        
-        # Group analyses by type
-        by_type = {}
-        for analysis in analyses:
-            analysis_type = analysis['analysis_type']
-            if analysis_type not in by_type:
-                by_type[analysis_type] = []
-            by_type[analysis_type].append(analysis)
-        
-        # Extract patterns for each type
-        for analysis_type, type_analyses in by_type.items():
-            if analysis_type == 'ioc_classification':
-                patterns.extend(self._extract_classification_patterns(type_analyses))
-            elif analysis_type == 'ttp_mapping':
-                patterns.extend(self._extract_ttp_patterns(type_analyses))
-        
+        patterns.extend(self._extract_classification_patterns(days))
+        patterns.extend(self._extract_ttp_patterns(days))
         return patterns
     
-    def _extract_classification_patterns(self, analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _extract_classification_patterns(self, days: int) -> List[Dict[str, Any]]:
         """Extract classification patterns from successful analyses."""
-        patterns = []
-        
-        # Group by risk level and category
-        risk_groups = {}
-        for analysis in analyses:
-            output = analysis.get('output_data', {})
-            if isinstance(output, str):
-                try:
-                    output = json.loads(output)
-                except:
-                    continue
-            
-            risk_level = output.get('risk_level', 'UNKNOWN')
-            category = output.get('category', 'unknown')
-            
-            key = f"{risk_level}_{category}"
-            if key not in risk_groups:
-                risk_groups[key] = []
-            risk_groups[key].append(analysis)
+        # SQLite groups by risk level and category and drops groups below the
+        # minimum occurrences for a pattern; only the groups come back
+        with self._conn_lock:
+            conn = self._get_connection()
+            groups = conn.execute(
+                self._window_sql(_CLASSIFICATION_GROUPS_SQL), (_epoch_cutoff(days * 24), 5)
+            ).fetchall()
         
-        # Extract patterns for each group
-        for group_key, group_analyses in risk_groups.items():
-            if len(group_analyses) >= 5:  # Minimum occurrences for pattern
-                pattern = self._create_classification_pattern(group_key, group_analyses)
-                if pattern:
-                    patterns.append(pattern)
+        patterns = []
+        for group in groups:
+            pattern = self._create_classification_pattern(group)
+            if pattern:
+                patterns.append(pattern)
         
         return patterns
     
-    def _create_classification_pattern(self, group_key: str, analyses: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """Create a classification pattern from grouped analyses."""
+    def _create_classification_pattern(self, group: sqlite3.Row) -> Optional[Dict[str, Any]]:
+        """Create a classification pattern from an aggregated (risk level, category) group."""
         try:
-            risk_level, category = group_key.split('_', 1)
-            
-            # Extract common input characteristics
-            common_features = []
-            for analysis in analyses:
-                input_data = analysis.get('input_data', {})
-                if isinstance(input_data, str):
-                    # Extract features from text input
-                    if any(keyword in input_data.lower() for keyword in ['phish', 'banking']):
-                        common_features.append('financial_keywords')
-                    if any(tld in input_data for tld in ['.tk', '.ml', '.ga']):
-                        common_features.append('suspicious_tld')
-            
-            # Calculate effectiveness score
-            avg_confidence = sum(a.get('confidence', 0) for a in analyses) / len(analyses)
+            risk_level, category = group['risk_level'], group['category']
             
             return {
                 'type': 'classification',
@@ -456,17 +789,19 @@ class ContinuousLearningManager:
                 'rules': {
                     'risk_level': risk_level,
                     'category': category,
-                    'common_features': list(set(common_features)),
-                    'sample_count': len(analyses)
+                    # Common input characteristics, OR-ed over the group by the query
+                    'common_features': _features_from_mask(group['features_mask']),
+                    'sample_count': group['sample_count']
                 },
-                'score': avg_confidence
+                # Effectiveness score is the group's average confidence
+                'score': group['avg_confidence']
             }
         
         except Exception as e:
             logger.error(f"❌ Error creating classification pattern: {e}")
             return None
     
-    def _extract_ttp_patterns(self, analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _extract_ttp_patterns(self, days: int) -> List[Dict[str, Any]]:
         """Extract TTP mapping patterns from successful analyses."""
         # Similar implementation for TTP patterns
         return []
@@ -477,14 +812,20 @@ class ContinuousLearningManager:
             "running": self.running,
             "current_model_version": self.current_model_version,
             "last_training_time": self.last_training_time.isoformat() if self.last_training_time else None,
-            "performance_history_count": len(self.performance_history),
+            "performance_history_count": len(self.performance_history) + self._count_archived_performance(),
             "learning_threshold": self.learning_threshold,
-            "min_training_samples": self.min_training_samples
+            "min_training_samples": self.min_training_samples,
+            "evaluation_interval": self.evaluation_interval
         }
     
     def stop(self):
         """Stop the continuous learning process."""
         self.running = False
+        self._wake_event.set()
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
         logger.info("⏹️  Continuous learning manager stopped")
 
 # Global continuous learning manager instance
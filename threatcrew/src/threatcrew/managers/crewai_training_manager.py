@@ -8,16 +8,43 @@ Provides feedback-driven improvement for multi-agent coordination and task execu
 
 import json
 import logging
+import sys
+import threading
 import time
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache, wraps
+from itertools import islice
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
 from ..tools.memory_system import get_memory
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+
+def _locked(method):
+    """Run a CrewAITrainingManager method while holding the manager's lock."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+@lru_cache(maxsize=1)
+def _load_pandas():
+    """Import pandas on first use; None when it is not installed."""
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    return pd
+
+
+@dataclass(slots=True)
 class AgentPerformance:
     agent_name: str
     task_type: str
@@ -27,7 +54,7 @@ class AgentPerformance:
     error_count: int
     last_evaluation: datetime
 
-@dataclass
+@dataclass(slots=True)
 class TaskExecution:
     task_id: str
     agent_name: str
@@ -45,11 +72,57 @@ class CrewAITrainingManager:
     Manages performance tracking and optimization for CrewAI agents.
     """
     
-    def __init__(self):
+    # Executions per agent/task combination that its performance metrics cover
+    PERFORMANCE_WINDOW = 100
+    
+    # Recent executions indexed per agent for feedback
+    AGENT_HISTORY = 1000
+    
+    # (min_success_rate, max_avg_time) for agents without optimization rules
+    DEFAULT_THRESHOLDS = (0.8, 30.0)
+    
+    def __init__(self, max_executions: int = 10000):
         self.memory = get_memory()
+        # Executions are recorded from the crew's background writer while analyses run
+        # on request threads; the lock guards every in-memory index and cache below
+        self._lock = threading.RLock()
         self.agent_performances: Dict[str, AgentPerformance] = {}
-        self.task_executions: List[TaskExecution] = []
+        # Most recent executions only; every execution is persisted via memory.store_analysis
+        self.task_executions: Deque[TaskExecution] = deque(maxlen=max_executions)
         self.optimization_rules = self._initialize_optimization_rules()
+        # Flattened views of optimization_rules with the defaults applied, read once per analysis
+        self._agent_thresholds: Dict[str, Tuple[float, float]] = {
+            name: (rules.get("min_success_rate", self.DEFAULT_THRESHOLDS[0]),
+                   rules.get("max_avg_time", self.DEFAULT_THRESHOLDS[1]))
+            for name, rules in self.optimization_rules.items()
+        }
+        self._agent_prompts: Dict[str, Dict[str, str]] = {
+            name: rules.get("optimization_prompts", {})
+            for name, rules in self.optimization_rules.items()
+        }
+        # agent -> enhanced prompt with the base prompt filled in, formatted per task type
+        self._prompt_templates: Dict[str, str] = {}
+        # Secondary indexes over task_executions, so lookups by agent or agent/task skip the scan
+        self._by_agent_task: Dict[Tuple[str, str], deque] = defaultdict(
+            lambda: deque(maxlen=self.PERFORMANCE_WINDOW))
+        self._by_agent: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.AGENT_HISTORY))
+        # (agent, task) -> running sums over that combination's _by_agent_task window
+        self._window_state: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Memoised analyses: an agent's entry is reused until it records another execution,
+        # the crew summary until any agent does (tracked by _performance_version)
+        self._analysis_cache: Dict[str, Dict[str, Any]] = {}
+        self._dirty_agents: set = set()
+        self._performance_version = 0
+        self._summary_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        # Column view of task_executions for window statistics: ring arrays written at
+        # _exec_count % max_executions, so slot order matches the deque's evictions
+        self._exec_times = np.zeros(max_executions, dtype=np.float64)
+        self._exec_success = np.zeros(max_executions, dtype=bool)
+        self._exec_conf = np.zeros(max_executions, dtype=np.float64)
+        self._exec_agent_ids = np.zeros(max_executions, dtype=np.int32)
+        self._exec_count = 0
+        self._agent_ids: Dict[str, int] = {}
+        self._agent_names: List[str] = []
     
     def _initialize_optimization_rules(self) -> Dict[str, Dict[str, Any]]:
         """Initialize optimization rules for different agent types."""
@@ -88,6 +161,9 @@ class CrewAITrainingManager:
                             execution_time: float, success: bool, confidence: float = 0.0,
                             error_message: Optional[str] = None):
         """Record the execution of a task by an agent."""
+        # Interned so the buffered executions and index keys share one copy of each name
+        agent_name = sys.intern(agent_name)
+        task_type = sys.intern(task_type)
         execution = TaskExecution(
             task_id=task_id,
             agent_name=agent_name,
@@ -101,9 +177,25 @@ class CrewAITrainingManager:
             timestamp=datetime.now()
         )
         
-        self.task_executions.append(execution)
+        with self._lock:
+            self.task_executions.append(execution)
+            self._by_agent[agent_name].append(execution)
+            
+            agent_id = self._agent_ids.get(agent_name)
+            if agent_id is None:
+                agent_id = self._agent_ids[agent_name] = len(self._agent_names)
+                self._agent_names.append(agent_name)
+            slot = self._exec_count % len(self._exec_times)
+            self._exec_times[slot] = execution.timestamp.timestamp()
+            self._exec_success[slot] = success
+            self._exec_conf[slot] = confidence
+            self._exec_agent_ids[slot] = agent_id
+            self._exec_count += 1
+            
+            # Update agent performance
+            self._update_agent_performance(agent_name, task_type, execution)
         
-        # Store in memory for persistence
+        # Store in memory for persistence, outside the lock
         self.memory.store_analysis(
             session_id=f"crewai_{task_id}",
             analysis_type=f"agent_execution_{agent_name}",
@@ -119,45 +211,69 @@ class CrewAITrainingManager:
             processing_time=execution_time
         )
         
-        # Update agent performance
-        self._update_agent_performance(agent_name, task_type, execution)
-        
         logger.info(f"📊 Recorded task execution: {agent_name} - {task_type} - {'✅' if success else '❌'}")
     
     def _update_agent_performance(self, agent_name: str, task_type: str, execution: TaskExecution):
         """Update performance metrics for an agent."""
         key = f"{agent_name}_{task_type}"
         
-        # Get recent executions for this agent/task combination
-        recent_executions = [
-            e for e in self.task_executions[-100:]  # Last 100 executions
-            if e.agent_name == agent_name and e.task_type == task_type
-        ]
-        
-        if not recent_executions:
-            return
-        
-        # Calculate performance metrics
-        success_count = sum(1 for e in recent_executions if e.success)
-        success_rate = success_count / len(recent_executions)
+        # Sliding window over the last PERFORMANCE_WINDOW executions of this
+        # agent/task combination, with sums kept current as executions enter and leave
+        window = self._by_agent_task[(agent_name, task_type)]
+        state = self._window_state.get((agent_name, task_type))
+        if state is None:
+            state = self._window_state[(agent_name, task_type)] = {
+                "sum_time": 0.0,
+                "sum_conf": 0.0,
+                "success_count": 0,
+                "error_count": 0
+            }
         
-        avg_processing_time = sum(e.execution_time for e in recent_executions) / len(recent_executions)
-        avg_confidence = sum(e.confidence for e in recent_executions) / len(recent_executions)
-        error_count = sum(1 for e in recent_executions if not e.success)
+        if len(window) == window.maxlen:
+            evicted = window[0]
+            state["sum_time"] -= evicted.execution_time
+            state["sum_conf"] -= evicted.confidence
+            if evicted.success:
+                state["success_count"] -= 1
+            else:
+                state["error_count"] -= 1
+        
+        window.append(execution)
+        state["sum_time"] += execution.execution_time
+        state["sum_conf"] += execution.confidence
+        if execution.success:
+            state["success_count"] += 1
+        else:
+            state["error_count"] += 1
         
         # Update or create performance record
+        count = len(window)
         self.agent_performances[key] = AgentPerformance(
             agent_name=agent_name,
             task_type=task_type,
-            success_rate=success_rate,
-            avg_processing_time=avg_processing_time,
-            avg_confidence=avg_confidence,
-            error_count=error_count,
+            success_rate=state["success_count"] / count,
+            avg_processing_time=state["sum_time"] / count,
+            avg_confidence=state["sum_conf"] / count,
+            error_count=state["error_count"],
             last_evaluation=datetime.now()
         )
+        self._dirty_agents.add(agent_name)
+        self._performance_version += 1
     
+    @_locked
     def analyze_agent_performance(self, agent_name: str) -> Dict[str, Any]:
-        """Analyze the performance of a specific agent."""
+        """Analyze the performance of a specific agent (memoised until its next recorded execution)."""
+        if agent_name not in self._dirty_agents and agent_name in self._analysis_cache:
+            return self._analysis_cache[agent_name]
+        
+        # Clear the flag first so an execution recorded meanwhile marks the result stale again
+        self._dirty_agents.discard(agent_name)
+        analysis = self._compute_agent_analysis(agent_name)
+        self._analysis_cache[agent_name] = analysis
+        return analysis
+    
+    def _compute_agent_analysis(self, agent_name: str) -> Dict[str, Any]:
+        """Analyze an agent's task performances against its optimization rules."""
         agent_performances = {
             k: v for k, v in self.agent_performances.items() 
             if v.agent_name == agent_name
@@ -174,14 +290,12 @@ class CrewAITrainingManager:
             "optimization_needed": False
         }
         
+        # Get optimization rules for this agent
+        min_success_rate, max_avg_time = self._agent_thresholds.get(agent_name, self.DEFAULT_THRESHOLDS)
+        
         for key, performance in agent_performances.items():
             task_type = performance.task_type
             
-            # Get optimization rules for this agent
-            rules = self.optimization_rules.get(agent_name, {})
-            min_success_rate = rules.get("min_success_rate", 0.8)
-            max_avg_time = rules.get("max_avg_time", 30.0)
-            
             # Analyze performance against rules
             task_status = "good"
             issues = []
@@ -226,8 +340,7 @@ class CrewAITrainingManager:
     def _generate_recommendations(self, agent_name: str, issues: List[str]) -> List[str]:
         """Generate specific recommendations for agent improvement."""
         recommendations = []
-        rules = self.optimization_rules.get(agent_name, {})
-        optimization_prompts = rules.get("optimization_prompts", {})
+        optimization_prompts = self._agent_prompts.get(agent_name, {})
         
         for issue in issues:
             if issue in optimization_prompts:
@@ -235,16 +348,22 @@ class CrewAITrainingManager:
         
         return recommendations
     
+    @_locked
     def get_crew_performance_summary(self) -> Dict[str, Any]:
-        """Get a summary of the entire crew's performance."""
+        """Get a summary of the entire crew's performance (memoised until the next recorded execution)."""
         if not self.agent_performances:
             return {"status": "no_data"}
         
+        version = self._performance_version
+        if self._summary_cache and self._summary_cache[0] == version:
+            return self._summary_cache[1]
+        
         # Analyze each agent
         agent_analyses = {}
         overall_optimization_needed = False
         
-        for agent_name in set(p.agent_name for p in self.agent_performances.values()):
+        # Every recorded agent is registered in the agent id table, in first-seen order
+        for agent_name in self._agent_names:
             analysis = self.analyze_agent_performance(agent_name)
             agent_analyses[agent_name] = analysis
             
@@ -257,7 +376,7 @@ class CrewAITrainingManager:
         crew_avg_time = sum(p.avg_processing_time for p in all_performances) / len(all_performances)
         crew_avg_confidence = sum(p.avg_confidence for p in all_performances) / len(all_performances)
         
-        return {
+        summary = {
             "overall_status": "needs_optimization" if overall_optimization_needed else "good",
             "crew_metrics": {
                 "success_rate": crew_success_rate,
@@ -268,7 +387,10 @@ class CrewAITrainingManager:
             "optimization_needed": overall_optimization_needed,
             "last_updated": datetime.now().isoformat()
         }
+        self._summary_cache = (version, summary)
+        return summary
     
+    @_locked
     def generate_agent_optimization_prompts(self, agent_name: str) -> Dict[str, str]:
         """Generate optimization prompts for a specific agent."""
         analysis = self.analyze_agent_performance(agent_name)
@@ -277,29 +399,38 @@ class CrewAITrainingManager:
             return {"status": "no_optimization_needed"}
         
         optimization_prompts = {}
+        template = self._get_prompt_template(agent_name)
         
         for task_type, task_performance in analysis.get("task_performances", {}).items():
             if task_performance.get("recommendations"):
                 # Create enhanced system prompt
-                base_prompt = self._get_base_agent_prompt(agent_name)
                 performance_context = self._get_performance_context(agent_name, task_type)
                 optimization_guidance = "\n".join(task_performance["recommendations"])
                 
-                enhanced_prompt = f"""
-{base_prompt}
+                optimization_prompts[task_type] = template.format(
+                    guidance=optimization_guidance,
+                    context=performance_context
+                )
+        
+        return optimization_prompts
+    
+    def _get_prompt_template(self, agent_name: str) -> str:
+        """Get the enhanced prompt template for an agent, with {guidance} and {context} left open."""
+        template = self._prompt_templates.get(agent_name)
+        if template is None:
+            # Braces in the base prompt are escaped so only the two fields are formatted
+            base_prompt = self._get_base_agent_prompt(agent_name).lstrip()
+            template = base_prompt.replace("{", "{{").replace("}", "}}") + """
 
 PERFORMANCE OPTIMIZATION GUIDANCE:
-{optimization_guidance}
+{guidance}
 
 RECENT PERFORMANCE CONTEXT:
-{performance_context}
+{context}
 
-Focus on implementing the above guidance to improve your performance in this task type.
-"""
-                
-                optimization_prompts[task_type] = enhanced_prompt.strip()
-        
-        return optimization_prompts
+Focus on implementing the above guidance to improve your performance in this task type."""
+            self._prompt_templates[agent_name] = template
+        return template
     
     def _get_base_agent_prompt(self, agent_name: str) -> str:
         """Get the base system prompt for an agent."""
@@ -332,39 +463,61 @@ Focus on improving areas where performance is below optimal thresholds.
 """
         return context.strip()
     
+    @_locked
     def get_training_feedback(self, days: int = 7) -> Dict[str, Any]:
         """Get feedback data for training improvements."""
         cutoff_time = datetime.now() - timedelta(days=days)
         
-        # Get recent executions
-        recent_executions = [
-            e for e in self.task_executions 
-            if e.timestamp >= cutoff_time
-        ]
+        # Window counts from the column view
+        size = min(self._exec_count, len(self._exec_times))
+        in_window = self._exec_times[:size] >= cutoff_time.timestamp()
+        window_count = int(np.count_nonzero(in_window))
         
-        if not recent_executions:
+        if not window_count:
             return {"status": "no_recent_data"}
         
-        # Analyze patterns in failures
-        failures = [e for e in recent_executions if not e.success]
-        success_patterns = [e for e in recent_executions if e.success and e.confidence > 0.8]
+        success = self._exec_success[:size][in_window]
+        success_count = int(np.count_nonzero(success))
+        high_confidence_count = int(np.count_nonzero(success & (self._exec_conf[:size][in_window] > 0.8)))
+        agent_ids = self._exec_agent_ids[:size][in_window]
+        agent_counts = np.bincount(agent_ids, minlength=len(self._agent_names))
+        agent_successes = np.bincount(agent_ids, weights=success, minlength=len(self._agent_names))
+        
+        # Executions are recorded in time order, so the window is the newest window_count
+        recent_executions = list(islice(reversed(self.task_executions), window_count))[::-1]
+        
+        # Group the window with pandas when available, in one frame for both analyses
+        pd = _load_pandas()
+        if pd is not None:
+            frame = self._executions_frame(pd, recent_executions)
+            common_failure_patterns = self._analyze_failure_patterns_frame(frame)
+            success_pattern_groups = self._analyze_success_patterns_frame(frame)
+        else:
+            # Analyze patterns in failures
+            failures = [e for e in recent_executions if not e.success]
+            success_patterns = [e for e in recent_executions if e.success and e.confidence > 0.8]
+            common_failure_patterns = self._analyze_failure_patterns(failures)
+            success_pattern_groups = self._analyze_success_patterns(success_patterns)
         
         feedback = {
             "period_days": days,
-            "total_executions": len(recent_executions),
-            "failure_count": len(failures),
-            "high_confidence_successes": len(success_patterns),
-            "common_failure_patterns": self._analyze_failure_patterns(failures),
-            "success_patterns": self._analyze_success_patterns(success_patterns),
+            "total_executions": window_count,
+            "failure_count": window_count - success_count,
+            "high_confidence_successes": high_confidence_count,
+            "common_failure_patterns": common_failure_patterns,
+            "success_patterns": success_pattern_groups,
             "agent_specific_feedback": {}
         }
         
-        # Generate agent-specific feedback
-        for agent_name in set(e.agent_name for e in recent_executions):
-            agent_executions = [e for e in recent_executions if e.agent_name == agent_name]
+        # Generate agent-specific feedback; improvement areas come from the agent's
+        # newest executions in the per-agent index (at most AGENT_HISTORY of them)
+        for agent_id in np.flatnonzero(agent_counts):
+            agent_name = self._agent_names[agent_id]
+            agent_count = int(agent_counts[agent_id])
+            agent_executions = list(islice(reversed(self._by_agent[agent_name]), agent_count))
             feedback["agent_specific_feedback"][agent_name] = {
-                "executions": len(agent_executions),
-                "success_rate": sum(1 for e in agent_executions if e.success) / len(agent_executions),
+                "executions": agent_count,
+                "success_rate": float(agent_successes[agent_id]) / agent_count,
                 "improvement_areas": self._identify_improvement_areas(agent_executions)
             }
         
@@ -407,15 +560,14 @@ Focus on improving areas where performance is below optimal thresholds.
         # Group by agent and task type
         groups = {}
         for success in successes:
-            key = f"{success.agent_name}_{success.task_type}"
+            key = (success.agent_name, success.task_type)
             if key not in groups:
                 groups[key] = []
             groups[key].append(success)
         
         # Analyze each group
-        for group_key, group_successes in groups.items():
+        for (agent_name, task_type), group_successes in groups.items():
             if len(group_successes) >= 3:
-                agent_name, task_type = group_key.split('_', 1)
                 patterns.append({
                     "agent": agent_name,
                     "task_type": task_type,
@@ -426,6 +578,52 @@ Focus on improving areas where performance is below optimal thresholds.
         
         return patterns
     
+    @staticmethod
+    def _executions_frame(pd, executions: List[TaskExecution]):
+        """Build a DataFrame of the scalar execution fields (input/output payloads are left out)."""
+        return pd.DataFrame({
+            "agent_name": [e.agent_name for e in executions],
+            "task_type": [e.task_type for e in executions],
+            "execution_time": [e.execution_time for e in executions],
+            "success": [e.success for e in executions],
+            "confidence": [e.confidence for e in executions],
+            "error_message": [e.error_message for e in executions]
+        })
+    
+    def _analyze_failure_patterns_frame(self, frame) -> List[Dict[str, Any]]:
+        """Vectorised _analyze_failure_patterns over an executions frame."""
+        failures = frame[~frame["success"]]
+        if failures.empty:
+            return []
+        
+        # Group by error type; a pattern requires at least 2 occurrences. Empty
+        # messages count as unknown, like the `or` fallback of the loop version
+        error_messages = failures["error_message"]
+        error_types = error_messages.mask(error_messages == "").fillna("unknown_error")
+        groups = failures.assign(error_type=error_types).groupby(
+            "error_type", sort=False
+        ).agg(
+            occurrences=("agent_name", "size"),
+            affected_agents=("agent_name", lambda agents: list(agents.unique())),
+            avg_execution_time=("execution_time", "mean")
+        )
+        return groups[groups["occurrences"] >= 2].reset_index().to_dict("records")
+    
+    def _analyze_success_patterns_frame(self, frame) -> List[Dict[str, Any]]:
+        """Vectorised _analyze_success_patterns over an executions frame."""
+        successes = frame[frame["success"] & (frame["confidence"] > 0.8)]
+        if successes.empty:
+            return []
+        
+        # Group by agent and task type; a pattern requires at least 3 successes
+        groups = successes.groupby(["agent_name", "task_type"], sort=False).agg(
+            success_count=("confidence", "size"),
+            avg_confidence=("confidence", "mean"),
+            avg_execution_time=("execution_time", "mean")
+        )
+        groups = groups[groups["success_count"] >= 3].reset_index()
+        return groups.rename(columns={"agent_name": "agent"}).to_dict("records")
+    
     def _identify_improvement_areas(self, executions: List[TaskExecution]) -> List[str]:
         """Identify specific improvement areas for an agent."""
         areas = []
@@ -433,9 +631,26 @@ Focus on improving areas where performance is below optimal thresholds.
         if not executions:
             return areas
         
-        success_rate = sum(1 for e in executions if e.success) / len(executions)
-        avg_time = sum(e.execution_time for e in executions) / len(executions)
-        avg_confidence = sum(e.confidence for e in executions) / len(executions)
+        # Single pass for the rates, averages and the confidence spread of successes
+        success_count = 0
+        total_time = 0.0
+        total_confidence = 0.0
+        conf_min = float("inf")
+        conf_max = float("-inf")
+        for e in executions:
+            total_time += e.execution_time
+            total_confidence += e.confidence
+            if e.success:
+                success_count += 1
+                if e.confidence < conf_min:
+                    conf_min = e.confidence
+                if e.confidence > conf_max:
+                    conf_max = e.confidence
+        
+        count = len(executions)
+        success_rate = success_count / count
+        avg_time = total_time / count
+        avg_confidence = total_confidence / count
         
         if success_rate < 0.8:
             areas.append("improve_success_rate")
@@ -447,8 +662,7 @@ Focus on improving areas where performance is below optimal thresholds.
             areas.append("increase_confidence")
         
         # Check for consistency issues
-        confidence_values = [e.confidence for e in executions if e.success]
-        if confidence_values and (max(confidence_values) - min(confidence_values)) > 0.4:
+        if success_count and (conf_max - conf_min) > 0.4:
             areas.append("improve_consistency")
         
         return areas
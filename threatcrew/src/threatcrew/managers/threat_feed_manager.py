@@ -7,20 +7,37 @@ Processes feeds from multiple sources and stores in memory system.
 """
 
 import asyncio
+import heapq
 import json
 import logging
+import os
+import re
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 import aiohttp
 import xml.etree.ElementTree as ET
 
+# orjson decodes large JSON feed payloads several times faster than stdlib json
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 from ..tools.memory_system import get_memory
 from ..tools.llm_classifier import run as classify_iocs
 
 logger = logging.getLogger(__name__)
 
+# Text feed patterns, compiled once and run over the whole payload in MULTILINE mode
+HOSTS_ENTRY_RE = re.compile(r'^[ \t]*127\.0\.0\.1[ \t]+(\S+)', re.MULTILINE)
+IPV4_LINE_RE = re.compile(r'^[ \t]*((?:\d{1,3}\.){3}\d{1,3}(?:/\d{1,2})?)[ \t\r]*(?:[#,;].*)?$', re.MULTILINE)
+DOMAIN_LINE_RE = re.compile(
+    r'^[ \t]*((?:[A-Za-z0-9-]+\.)+[A-Za-z][A-Za-z0-9-]*)[ \t\r]*(?:[#,;].*)?$', re.MULTILINE
+)
+
 @dataclass
 class ThreatFeed:
     name: str
@@ -30,17 +47,36 @@ class ThreatFeed:
     last_updated: Optional[datetime] = None
     active: bool = True
     headers: Optional[Dict[str, str]] = None
+    etag: Optional[str] = None  # validators from the last 200 response
+    last_modified: Optional[str] = None
 
 class ThreatFeedManager:
     """
     Manages multiple threat intelligence feeds and processes them automatically.
     """
     
+    # Upper bound on simultaneous feed downloads sharing one HTTP session
+    MAX_CONCURRENT_FETCHES = 8
+    
+    # Number of recently ingested IOCs remembered to skip republished entries
+    SEEN_IOC_CACHE_SIZE = 1_000_000
+    
+    # Feeds falling due within this many seconds of each other are fetched as one batch
+    SCHEDULE_BATCH_WINDOW = 5
+    
+    # Per-URL ETag/Last-Modified validators, kept next to the memory DB across restarts
+    VALIDATORS_FILE = "feed_validators.json"
+    
     def __init__(self):
         self.memory = get_memory()
         self.feeds = self._initialize_default_feeds()
         self.session_id = f"feed_manager_{int(time.time())}"
         self.running = False
+        self._seen_iocs: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._validators_path = os.path.join(self.memory.knowledge_dir, self.VALIDATORS_FILE)
+        self._validators = self._load_feed_validators()
+        for feed in self.feeds:
+            self._apply_feed_validators(feed)
     
     def _initialize_default_feeds(self) -> List[ThreatFeed]:
         """Initialize default threat intelligence feeds."""
@@ -84,59 +120,135 @@ class ThreatFeedManager:
         self.running = True
         logger.info("🚀 Starting threat feed monitoring...")
         
-        tasks = []
-        for feed in self.feeds:
-            if feed.active:
-                task = asyncio.create_task(self._monitor_feed(feed))
-                tasks.append(task)
+        # Single scheduler: a heap of (next_due, index, feed) on the monotonic clock
+        now = time.monotonic()
+        due = [
+            (now + self._seconds_until_update(feed), index, feed)
+            for index, feed in enumerate(self.feeds) if feed.active
+        ]
+        heapq.heapify(due)
         
         try:
-            await asyncio.gather(*tasks)
+            while self.running and due:
+                await asyncio.sleep(max(0.0, due[0][0] - time.monotonic()))
+                
+                # Drain every feed due within the batch window so they fetch together
+                batch_deadline = time.monotonic() + self.SCHEDULE_BATCH_WINDOW
+                batch = []
+                while due and due[0][0] <= batch_deadline:
+                    _, index, feed = heapq.heappop(due)
+                    batch.append((index, feed))
+                
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(f"📡 Updating feeds: {', '.join(feed.name for _, feed in batch)}")
+                try:
+                    await self.process_feeds([feed for _, feed in batch])
+                except Exception as e:
+                    logger.error(f"❌ Error processing feed batch: {e}")
+                    # Retry the batch shortly instead of waiting a full interval
+                    for index, feed in batch:
+                        heapq.heappush(due, (time.monotonic() + 60, index, feed))
+                    continue
+                
+                for index, feed in batch:
+                    feed.last_updated = datetime.now()
+                    heapq.heappush(due, (time.monotonic() + feed.update_interval * 60, index, feed))
         except KeyboardInterrupt:
             logger.info("⏹️  Stopping threat feed monitoring...")
             self.running = False
     
-    async def _monitor_feed(self, feed: ThreatFeed):
-        """Monitor a single threat feed."""
-        while self.running:
-            try:
-                if self._should_update_feed(feed):
-                    logger.info(f"📡 Updating feed: {feed.name}")
-                    await self._process_feed(feed)
-                    feed.last_updated = datetime.now()
-                
-                # Wait for next update interval
-                await asyncio.sleep(feed.update_interval * 60)
-                
-            except Exception as e:
-                logger.error(f"❌ Error processing feed {feed.name}: {e}")
-                # Wait before retrying
-                await asyncio.sleep(60)
-    
     def _should_update_feed(self, feed: ThreatFeed) -> bool:
         """Check if a feed should be updated."""
+        return self._seconds_until_update(feed) == 0
+    
+    def _seconds_until_update(self, feed: ThreatFeed) -> float:
+        """Seconds until a feed is next due for an update (0 if due now)."""
         if feed.last_updated is None:
-            return True
+            return 0.0
         
         time_since_update = datetime.now() - feed.last_updated
-        return time_since_update >= timedelta(minutes=feed.update_interval)
+        remaining = timedelta(minutes=feed.update_interval) - time_since_update
+        return max(0.0, remaining.total_seconds())
     
-    async def _process_feed(self, feed: ThreatFeed):
+    async def process_feeds(self, feeds: List[ThreatFeed]):
+        """Fetch and process several feeds concurrently over a shared HTTP session."""
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+        
+        async def _bounded(feed: ThreatFeed, session: aiohttp.ClientSession):
+            async with semaphore:
+                await self._process_feed(feed, session)
+        
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(_bounded(feed, session) for feed in feeds))
+    
+    async def _process_feed(self, feed: ThreatFeed, session: Optional[aiohttp.ClientSession] = None):
         """Process a single threat feed and extract IOCs."""
-        try:
+        if session is None:
             async with aiohttp.ClientSession() as session:
-                async with session.get(feed.url, headers=feed.headers) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        iocs = self._extract_iocs_from_content(content, feed)
-                        await self._process_extracted_iocs(iocs, feed.name)
-                    else:
-                        logger.warning(f"⚠️  Feed {feed.name} returned status {response.status}")
+                await self._process_feed(feed, session)
+            return
+        
+        try:
+            async with session.get(feed.url, headers=self._request_headers(feed)) as response:
+                if response.status == 304:
+                    logger.info(f"💤 Feed {feed.name} not modified since last fetch")
+                elif response.status == 200:
+                    # JSON payloads are decoded straight from bytes
+                    content = await response.read() if feed.feed_type == "json" else await response.text()
+                    iocs = self._extract_iocs_from_content(content, feed)
+                    # Validators are kept only once the payload is fully stored, so a
+                    # failed run refetches the body instead of getting a 304
+                    if await self._process_extracted_iocs(iocs, feed.name):
+                        self._save_feed_validators(
+                            feed, response.headers.get("ETag"), response.headers.get("Last-Modified")
+                        )
+                else:
+                    logger.warning(f"⚠️  Feed {feed.name} returned status {response.status}")
         
         except Exception as e:
             logger.error(f"❌ Failed to process feed {feed.name}: {e}")
     
-    def _extract_iocs_from_content(self, content: str, feed: ThreatFeed) -> List[Dict[str, Any]]:
+    def _request_headers(self, feed: ThreatFeed) -> Dict[str, str]:
+        """Build request headers, adding conditional-GET validators when known."""
+        headers = dict(feed.headers or {})
+        if feed.etag:
+            headers["If-None-Match"] = feed.etag
+        if feed.last_modified:
+            headers["If-Modified-Since"] = feed.last_modified
+        return headers
+    
+    def _load_feed_validators(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """Load the validators saved by earlier runs, keyed by feed URL."""
+        try:
+            with open(self._validators_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Ignoring unreadable feed validators file: {e}")
+            return {}
+    
+    def _apply_feed_validators(self, feed: ThreatFeed):
+        """Restore a feed's saved validators, if any."""
+        validators = self._validators.get(feed.url)
+        if validators:
+            feed.etag = validators.get("etag")
+            feed.last_modified = validators.get("last_modified")
+    
+    def _save_feed_validators(self, feed: ThreatFeed, etag: Optional[str], last_modified: Optional[str]):
+        """Remember a stored payload's validators and persist them atomically."""
+        feed.etag = etag
+        feed.last_modified = last_modified
+        self._validators[feed.url] = {"etag": etag, "last_modified": last_modified}
+        tmp_path = self._validators_path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._validators, f, indent=2)
+            os.replace(tmp_path, self._validators_path)
+        except OSError as e:
+            logger.warning(f"⚠️  Could not persist feed validators: {e}")
+    
+    def _extract_iocs_from_content(self, content: Union[str, bytes], feed: ThreatFeed) -> List[Dict[str, Any]]:
         """Extract IOCs from feed content based on feed type."""
         iocs = []
         
@@ -152,36 +264,42 @@ class ThreatFeedManager:
         
         except Exception as e:
             logger.error(f"❌ Failed to extract IOCs from {feed.name}: {e}")
+            raise
         
         return iocs
     
-    def _extract_from_json(self, content: str, feed: ThreatFeed) -> List[Dict[str, Any]]:
+    def _extract_from_json(self, content: Union[str, bytes], feed: ThreatFeed) -> List[Dict[str, Any]]:
         """Extract IOCs from JSON feed."""
         iocs = []
-        data = json.loads(content)
+        data = json_loads(content)
+        source = feed.name
         
-        if feed.name == "Abuse.ch URLhaus":
-            for item in data.get("urlhaus", []):
-                if item.get("url_status") == "online":
-                    iocs.append({
-                        "ioc": item.get("url"),
-                        "ioc_type": "url",
-                        "source": feed.name,
-                        "threat_type": item.get("threat", "unknown"),
-                        "tags": item.get("tags", [])
-                    })
+        if source == "Abuse.ch URLhaus":
+            iocs = [
+                {
+                    "ioc": item.get("url"),
+                    "ioc_type": "url",
+                    "source": source,
+                    "threat_type": item.get("threat", "unknown"),
+                    "tags": item.get("tags", [])
+                }
+                for item in data.get("urlhaus", [])
+                if item.get("url_status") == "online"
+            ]
         
-        elif feed.name == "MISP Feed":
-            for event in data.get("response", {}).get("Event", []):
-                for attribute in event.get("Attribute", []):
-                    if attribute.get("to_ids") and not attribute.get("deleted"):
-                        iocs.append({
-                            "ioc": attribute.get("value"),
-                            "ioc_type": attribute.get("type"),
-                            "source": feed.name,
-                            "category": attribute.get("category"),
-                            "comment": attribute.get("comment")
-                        })
+        elif source == "MISP Feed":
+            iocs = [
+                {
+                    "ioc": attribute.get("value"),
+                    "ioc_type": attribute.get("type"),
+                    "source": source,
+                    "category": attribute.get("category"),
+                    "comment": attribute.get("comment")
+                }
+                for event in data.get("response", {}).get("Event", [])
+                for attribute in event.get("Attribute", [])
+                if attribute.get("to_ids") and not attribute.get("deleted")
+            ]
         
         return iocs
     
@@ -205,24 +323,24 @@ class ThreatFeedManager:
     
     def _extract_from_text(self, content: str, feed: ThreatFeed) -> List[Dict[str, Any]]:
         """Extract IOCs from text feed."""
-        iocs = []
+        source = feed.name
         
-        if feed.name == "Malware Domain List":
-            lines = content.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    # Format: 127.0.0.1 malicious.domain.com
-                    parts = line.split()
-                    if len(parts) >= 2 and parts[0] == "127.0.0.1":
-                        domain = parts[1]
-                        iocs.append({
-                            "ioc": domain,
-                            "ioc_type": "domain",
-                            "source": feed.name,
-                            "threat_type": "malware"
-                        })
+        if source == "Malware Domain List":
+            # Format: 127.0.0.1 malicious.domain.com
+            return [
+                {"ioc": domain, "ioc_type": "domain", "source": source, "threat_type": "malware"}
+                for domain in HOSTS_ENTRY_RE.findall(content)
+            ]
         
+        # Generic one-indicator-per-line lists (e.g. FireHOL netsets, C2 domain lists)
+        iocs = [
+            {"ioc": ip, "ioc_type": "ip_address", "source": source, "threat_type": "unknown"}
+            for ip in IPV4_LINE_RE.findall(content)
+        ]
+        iocs.extend(
+            {"ioc": domain, "ioc_type": "domain", "source": source, "threat_type": "unknown"}
+            for domain in DOMAIN_LINE_RE.findall(content)
+        )
         return iocs
     
     def _extract_from_csv(self, content: str, feed: ThreatFeed) -> List[Dict[str, Any]]:
@@ -230,42 +348,84 @@ class ThreatFeedManager:
         # Implement CSV parsing logic based on feed format
         return []
     
-    async def _process_extracted_iocs(self, iocs: List[Dict[str, Any]], source: str):
-        """Process extracted IOCs through classification and storage."""
+    async def _process_extracted_iocs(self, iocs: List[Dict[str, Any]], source: str) -> bool:
+        """Process extracted IOCs through classification and storage.
+        
+        Returns True when every new IOC was classified and stored.
+        """
         logger.info(f"📊 Processing {len(iocs)} IOCs from {source}")
         
+        ioc_records = []
+        analyses = []
+        batch_keys = set()
+        complete = True
         for ioc_data in iocs:
+            key = (ioc_data.get("ioc"), ioc_data.get("ioc_type"))
+            if key in batch_keys or not self._is_new_ioc(key):
+                continue
+            batch_keys.add(key)
+            
             try:
-                # Classify the IOC using the LLM classifier
-                classification_result = classify_iocs(ioc_data["ioc"])
-                
-                # Store in memory system
-                ioc_id = self.memory.store_ioc(
-                    ioc=ioc_data["ioc"],
-                    ioc_type=ioc_data["ioc_type"],
-                    risk_level=classification_result.get("risk_level", "UNKNOWN"),
-                    category=classification_result.get("category", "unknown"),
-                    confidence=classification_result.get("confidence", 0.5),
-                    source=source,
-                    metadata={
-                        "feed_source": source,
-                        "original_data": ioc_data,
-                        "auto_classified": True,
-                        "classification_result": classification_result
-                    }
-                )
-                
-                # Store analysis history
-                self.memory.store_analysis(
-                    session_id=self.session_id,
-                    analysis_type="feed_processing",
-                    input_data=ioc_data,
-                    output_data=classification_result,
-                    confidence=classification_result.get("confidence", 0.5)
-                )
-                
+                # Classify the IOC using the LLM classifier, off the event loop thread
+                classification_result = await asyncio.to_thread(classify_iocs, ioc_data["ioc"])
             except Exception as e:
                 logger.error(f"❌ Failed to process IOC {ioc_data.get('ioc')}: {e}")
+                complete = False
+                continue
+            
+            ioc_records.append({
+                "ioc": ioc_data["ioc"],
+                "ioc_type": ioc_data["ioc_type"],
+                "risk_level": classification_result.get("risk_level", "UNKNOWN"),
+                "category": classification_result.get("category", "unknown"),
+                "confidence": classification_result.get("confidence", 0.5),
+                "source": source,
+                "metadata": {
+                    "feed_source": source,
+                    "original_data": ioc_data,
+                    "auto_classified": True,
+                    "classification_result": classification_result
+                }
+            })
+            analyses.append({
+                "input_data": ioc_data,
+                "output_data": classification_result,
+                "confidence": classification_result.get("confidence", 0.5)
+            })
+        
+        if not ioc_records:
+            return complete
+        
+        # Store the whole payload in one transaction per table, off the event
+        # loop thread so other feed downloads keep progressing during disk I/O
+        try:
+            await asyncio.to_thread(self._store_feed_results, ioc_records, analyses)
+        except Exception as e:
+            logger.error(f"❌ Failed to store IOCs from {source}: {e}")
+            return False
+        
+        # Only stored IOCs are remembered, so failed ones are retried next poll
+        self._mark_iocs_seen((record["ioc"], record["ioc_type"]) for record in ioc_records)
+        return complete
+    
+    def _store_feed_results(self, ioc_records: List[Dict[str, Any]], analyses: List[Dict[str, Any]]):
+        """Write classified IOCs and their analysis records to the memory DB."""
+        self.memory.store_iocs_bulk(ioc_records)
+        self.memory.store_analyses_bulk(self.session_id, "feed_processing", analyses)
+    
+    def _is_new_ioc(self, key: Tuple[str, str]) -> bool:
+        """Return False for an (ioc, ioc_type) ingested recently, refreshing its LRU position."""
+        if key in self._seen_iocs:
+            self._seen_iocs.move_to_end(key)
+            return False
+        return True
+    
+    def _mark_iocs_seen(self, keys: Iterable[Tuple[str, str]]):
+        """Record stored (ioc, ioc_type) pairs in the bounded LRU."""
+        for key in keys:
+            self._seen_iocs[key] = None
+        while len(self._seen_iocs) > self.SEEN_IOC_CACHE_SIZE:
+            self._seen_iocs.popitem(last=False)
     
     def add_custom_feed(self, name: str, url: str, feed_type: str, 
                        update_interval: int, headers: Dict[str, str] = None):
@@ -277,6 +437,7 @@ class ThreatFeedManager:
             update_interval=update_interval,
             headers=headers
         )
+        self._apply_feed_validators(feed)
         self.feeds.append(feed)
         logger.info(f"➕ Added custom feed: {name}")
     
@@ -15,7 +15,11 @@ from typing import List, Dict, Any, Tuple
 from pathlib import Path
 
 from .memory_system import get_memory
-from ..config.data_source_config import DATA_SOURCE_CONFIG, TRAINING_CONFIG
+from ..config.data_source_config import DATA_SOURCE_CONFIG, TRAINING_CONFIG, is_excluded_source
+
+# Base model for generated Modelfiles. The 4-bit q4_K_M GGUF roughly halves
+# memory bandwidth per token versus FP16; set BASE_MODEL=llama3 to serve FP16.
+DEFAULT_BASE_MODEL = os.getenv('BASE_MODEL', 'llama3:8b-instruct-q4_K_M')
 
 
 class ThreatFineTuner:
@@ -37,6 +41,14 @@ class ThreatFineTuner:
         Generate a training dataset from stored threat intelligence data.
         Returns the path to the generated dataset file.
         """
+        return self.generate_training_dataset_with_count()[0]
+    
+    def generate_training_dataset_with_count(self) -> Tuple[str, int]:
+        """
+        Generate a training dataset from stored threat intelligence data.
+        Returns the path to the generated dataset file and the number of examples
+        (lines) written to it.
+        """
         # Log configuration settings
         use_real_data_only = DATA_SOURCE_CONFIG.get("USE_REAL_DATA_ONLY", False)
         disable_synthetic = DATA_SOURCE_CONFIG.get("DISABLE_SYNTHETIC_DATA", False)
@@ -45,7 +57,7 @@ class ThreatFineTuner:
         print(f"   ✅ Use Real Data Only: {use_real_data_only}")
         print(f"   ❌ Disable Synthetic Data: {disable_synthetic}")
         print(f"   📊 Min Confidence Threshold: {DATA_SOURCE_CONFIG.get('MIN_CONFIDENCE_THRESHOLD', 0.5)}")
-        print(f"   🚫 Excluded Sources: {DATA_SOURCE_CONFIG.get('EXCLUDED_DATA_SOURCES', [])}")
+        print(f"   🚫 Excluded Sources: {sorted(DATA_SOURCE_CONFIG.get('EXCLUDED_DATA_SOURCES', []))}")
         
         training_data = []
         
@@ -78,7 +90,7 @@ class ThreatFineTuner:
         print(f"💾 Saved to: {dataset_path}")
         print(f"🔍 Data Source: {'Real threat intelligence only' if use_real_data_only else 'Mixed real and synthetic data'}")
         
-        return dataset_path
+        return dataset_path, len(training_data)
     
     def _generate_ioc_classification_examples(self) -> List[Dict]:
         """Generate training examples for IOC classification."""
@@ -132,7 +144,7 @@ class ThreatFineTuner:
                     metadata = json.loads(metadata_str or '{}')
                     
                     # Skip if source is in excluded list or marked as synthetic
-                    if source != 'unknown' and any(excluded in source.lower() for excluded in excluded_sources):
+                    if source != 'unknown' and is_excluded_source(source):
                         continue
                     
                     # Create instruction-following example from real data
@@ -286,7 +298,7 @@ class ThreatFineTuner:
             if record['input_data'] and record['output_data']:
                 # Filter out synthetic/demo data
                 source = record.get('metadata', {}).get('source', '')
-                if any(excluded in source.lower() for excluded in excluded_sources):
+                if is_excluded_source(source):
                     continue
                 
                 instruction = "Generate a professional threat intelligence report from the provided real IOC analysis data."
@@ -459,7 +471,7 @@ RECOMMENDED ACTIONS:
         
         config = {
             "model_name": "threat-intelligence-llama3",
-            "base_model": "llama3",
+            "base_model": DEFAULT_BASE_MODEL,
             "training_data": {
                 "total_examples": stats['total_analyses'],
                 "ioc_examples": stats['total_iocs'],
@@ -479,7 +491,7 @@ RECOMMENDED ACTIONS:
         
         return config
     
-    def _generate_ollama_modelfile(self) -> str:
+    def _generate_ollama_modelfile(self, base_model: str = DEFAULT_BASE_MODEL) -> str:
         """Generate Ollama Modelfile for custom fine-tuned model."""
         stats = self.memory.get_statistics()
         
@@ -504,7 +516,7 @@ Your expertise includes:
         
         system_prompt += "\nAlways provide detailed analysis with confidence scores and actionable recommendations."
         
-        modelfile = f'''FROM llama3
+        modelfile = f'''FROM {base_model}
 
 SYSTEM """{system_prompt}"""
 
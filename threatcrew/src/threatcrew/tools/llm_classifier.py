@@ -21,12 +21,14 @@ def run(indicators: list) -> list:
     session_id = str(uuid.uuid4())
     
     results = []
+    new_iocs = []
     start_time = time.time()
     
-    for indicator in indicators:
+    # Look up history for the whole batch at once
+    similar_by_indicator = memory.search_similar_iocs_batch(indicators, limit=3)
+    
+    for indicator, similar_iocs in zip(indicators, similar_by_indicator):
         # Check if we've seen this IOC before
-        similar_iocs = memory.search_similar_iocs(indicator, limit=3)
-        
         if similar_iocs and similar_iocs[0]['similarity'] > 0.9:
             # Use known classification with high confidence
             known_ioc = similar_iocs[0]
@@ -42,23 +44,27 @@ def run(indicators: list) -> list:
             # Perform new classification with context
             result = _classify_with_context(indicator, similar_iocs)
             
-            # Store new classification in memory
-            ioc_id = memory.store_ioc(
-                ioc=indicator,
-                ioc_type=_detect_ioc_type(indicator),
-                risk_level=result['risk'],
-                category=result['category'],
-                confidence=result.get('confidence', 0.7),
-                source="llm_analysis",
-                metadata={
+            # Queue new classification for memory
+            new_iocs.append({
+                "ioc": indicator,
+                "ioc_type": _detect_ioc_type(indicator),
+                "risk_level": result['risk'],
+                "category": result['category'],
+                "confidence": result.get('confidence', 0.7),
+                "source": "llm_analysis",
+                "metadata": {
                     "session_id": session_id,
                     "reasoning": result.get('reasoning', ''),
                     "similar_count": len(similar_iocs)
                 }
-            )
+            })
         
         results.append(result)
     
+    # Store all new classifications in one transaction
+    if new_iocs:
+        memory.store_iocs_bulk(new_iocs)
+    
     # Store analysis session
     processing_time = time.time() - start_time
     memory.store_analysis(
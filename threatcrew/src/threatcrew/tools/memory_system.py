@@ -10,11 +10,14 @@ import json
 import sqlite3
 import os
 import logging
+import threading
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 import numpy as np
 from pathlib import Path
 
+from ..config.data_source_config import is_excluded_source
+
 logger = logging.getLogger(__name__)
 
 # For vector embeddings (using sentence-transformers)
@@ -25,6 +28,27 @@ except ImportError:
     EMBEDDINGS_AVAILABLE = False
     print("⚠️  Install sentence-transformers for enhanced memory: pip install sentence-transformers")
 
+# orjson serializes knowledge pattern rules several times faster than stdlib json
+try:
+    import orjson
+    
+    def _json_dumps(data: Any) -> str:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    _json_dumps = json.dumps
+
+# Approximate nearest-neighbour index for IOC similarity search
+try:
+    import hnswlib
+    HNSW_AVAILABLE = True
+except ImportError:
+    HNSW_AVAILABLE = False
+
+
+def _is_synthetic(source: Optional[str]) -> int:
+    """Value of the iocs.is_synthetic flag for an IOC stored from `source`."""
+    return int(bool(source) and is_excluded_source(source))
+
 
 class ThreatMemoryDB:
     """
@@ -46,6 +70,11 @@ class ThreatMemoryDB:
             self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
         else:
             self.embedding_model = None
+        
+        # HNSW index over stored IOC embeddings (labels are iocs.id), built on the
+        # first search and then updated in place as IOCs are written
+        self._ioc_index = None
+        self._ioc_index_lock = threading.Lock()
             
         self._init_database()
     
@@ -54,6 +83,9 @@ class ThreatMemoryDB:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
+            # WAL lets readers proceed during ingestion and is persisted in the DB file
+            cursor.execute('PRAGMA journal_mode=WAL')
+            
             # IOC storage table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS iocs (
@@ -68,10 +100,30 @@ class ThreatMemoryDB:
                     last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     times_seen INTEGER DEFAULT 1,
                     metadata TEXT,
-                    embedding BLOB
+                    embedding BLOB,
+                    is_synthetic INTEGER NOT NULL DEFAULT 0
                 )
             ''')
             
+            # is_synthetic caches is_excluded_source(source), evaluated when the IOC is
+            # first stored, so real-data counts are an index range instead of a token
+            # match per row. Databases created before the column get it backfilled once;
+            # later changes to EXCLUDED_DATA_SOURCES do not re-flag stored IOCs.
+            ioc_columns = {row[1] for row in cursor.execute('PRAGMA table_info(iocs)')}
+            if 'is_synthetic' not in ioc_columns:
+                cursor.execute('ALTER TABLE iocs ADD COLUMN is_synthetic INTEGER NOT NULL DEFAULT 0')
+                cursor.executemany('UPDATE iocs SET is_synthetic = 1 WHERE id = ?', [
+                    (ioc_id,) for ioc_id, source in cursor.execute('SELECT id, source FROM iocs WHERE source IS NOT NULL').fetchall()
+                    if is_excluded_source(source)
+                ])
+            
+            # Source lookups drive real-data filtering for training
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_iocs_source ON iocs(source)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_iocs_synthetic_source ON iocs(is_synthetic, source)')
+            # Recency indexes let the historical-context queries read the newest
+            # rows straight off the index instead of sorting the whole table
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_iocs_last_seen ON iocs(last_seen)')
+            
             # TTP mappings table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS ttp_mappings (
@@ -86,6 +138,8 @@ class ThreatMemoryDB:
                 )
             ''')
             
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_ttp_mappings_created_at ON ttp_mappings(created_at)')
+            
             # Analysis history table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS analysis_history (
@@ -100,6 +154,37 @@ class ThreatMemoryDB:
                     embedding BLOB
                 )
             ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_history_created_at ON analysis_history(created_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_history_type_created ON analysis_history(analysis_type, created_at)')
+            
+            # Integer unix time of created_at (stored as a UTC 'YYYY-MM-DD HH:MM:SS' string),
+            # so time-window queries compare fixed-size integers
+            analysis_columns = {row[1] for row in cursor.execute('PRAGMA table_xinfo(analysis_history)')}
+            try:
+                if 'created_at_epoch' not in analysis_columns:
+                    cursor.execute('''
+                        ALTER TABLE analysis_history ADD COLUMN created_at_epoch INTEGER GENERATED ALWAYS AS
+                        (CAST(strftime('%s', created_at) AS INTEGER)) VIRTUAL
+                    ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_history_created_epoch ON analysis_history(created_at_epoch)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_history_type_epoch ON analysis_history(analysis_type, created_at_epoch)')
+            except sqlite3.OperationalError as e:
+                # SQLite older than 3.31 has no generated columns; readers compare on created_at
+                logger.warning(f"Analysis epoch column unavailable: {e}")
+            
+            # Risk level and category projected out of the JSON output, so the
+            # learning manager can filter and group on them without parsing rows
+            try:
+                for column in ('risk_level', 'category'):
+                    if column not in analysis_columns:
+                        cursor.execute(f'''
+                            ALTER TABLE analysis_history ADD COLUMN {column} TEXT GENERATED ALWAYS AS
+                            (CASE WHEN json_valid(output_data) THEN json_extract(output_data, '$.{column}') END) VIRTUAL
+                        ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_history_type_risk ON analysis_history(analysis_type, risk_level)')
+            except sqlite3.OperationalError as e:
+                # SQLite built without JSON1 or generated columns; readers fall back to parsing rows
+                logger.warning(f"Analysis projection columns unavailable: {e}")
             
             # Knowledge patterns table
             cursor.execute('''
@@ -114,6 +199,8 @@ class ThreatMemoryDB:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # One row per learned pattern; re-learning a pattern refreshes it in place
+            cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_knowledge_patterns_type_text ON knowledge_patterns(pattern_type, pattern_text)')
             
             conn.commit()
     
@@ -129,9 +216,63 @@ class ThreatMemoryDB:
             print(f"Warning: Could not generate embedding: {e}")
             return None
     
+    def _get_embeddings(self, texts: List[str], batch_size: int = 64) -> List[Optional[bytes]]:
+        """Generate embeddings for many texts, encoding batch_size texts per model call."""
+        if not self.embedding_model or not texts:
+            return [None] * len(texts)
+        
+        try:
+            embeddings = self.embedding_model.encode(list(texts), batch_size=batch_size)
+            return [embedding.tobytes() for embedding in embeddings]
+        except Exception as e:
+            print(f"Warning: Could not generate embeddings: {e}")
+            return [None] * len(texts)
+    
+    def backfill_embeddings(self, batch_size: int = 128) -> int:
+        """
+        Embed stored IOCs and analyses that have no embedding yet.
+        
+        Rows are processed in chunks of ``batch_size``, one model call and one
+        transaction per chunk. Returns the number of rows updated.
+        """
+        if not self.embedding_model:
+            return 0
+        
+        sources = (
+            ('iocs', "ioc || ' ' || category || ' ' || risk_level"),
+            ('analysis_history', "analysis_type || ' ' || COALESCE(input_data, '')"),
+        )
+        updated = 0
+        with self._get_connection() as conn:
+            for table, text_sql in sources:
+                last_id = 0
+                while True:
+                    rows = conn.execute(
+                        f'SELECT id, {text_sql} FROM {table} '
+                        f'WHERE embedding IS NULL AND id > ? ORDER BY id LIMIT ?',
+                        (last_id, batch_size)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    embeddings = self._get_embeddings([row[1] for row in rows], batch_size)
+                    conn.executemany(
+                        f'UPDATE {table} SET embedding = ? WHERE id = ?',
+                        [(embedding, row[0]) for row, embedding in zip(rows, embeddings) if embedding]
+                    )
+                    conn.commit()
+                    updated += sum(1 for embedding in embeddings if embedding)
+                    if table == 'iocs':
+                        self._refresh_ioc_index(conn, 'id', [row[0] for row in rows])
+        
+        return updated
+    
     def _get_connection(self):
         """Get database connection context manager."""
-        return sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
     
     def store_ioc(self, ioc: str, ioc_type: str, risk_level: str, 
                   category: str, confidence: float = 0.0, 
@@ -158,16 +299,49 @@ class ThreatMemoryDB:
                     WHERE id = ?
                 ''', (risk_level, category, confidence, times_seen + 1, 
                      json.dumps(metadata or {}), embedding, ioc_id))
-                return ioc_id
             else:
                 # Insert new IOC
                 cursor.execute('''
                     INSERT INTO iocs (ioc, ioc_type, risk_level, category, 
-                                    confidence, source, metadata, embedding)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                                    confidence, source, metadata, embedding, is_synthetic)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (ioc, ioc_type, risk_level, category, confidence, 
-                     source, json.dumps(metadata or {}), embedding))
-                return cursor.lastrowid
+                     source, json.dumps(metadata or {}), embedding, _is_synthetic(source)))
+                ioc_id = cursor.lastrowid
+            
+            conn.commit()
+            self._refresh_ioc_index(conn, 'id', [ioc_id])
+            return ioc_id
+    
+    def store_iocs_bulk(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Store or update many IOCs in a single transaction.
+        
+        Each record takes the same keys as the ``store_ioc`` arguments.
+        Returns the number of records written.
+        """
+        embeddings = self._get_embeddings([f"{r['ioc']} {r['category']} {r['risk_level']}" for r in records])
+        rows = [(
+            r['ioc'], r['ioc_type'], r['risk_level'], r['category'],
+            r.get('confidence', 0.0), r.get('source'),
+            json.dumps(r.get('metadata') or {}),
+            embedding, _is_synthetic(r.get('source'))
+        ) for r, embedding in zip(records, embeddings)]
+        
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO iocs (ioc, ioc_type, risk_level, category, 
+                                confidence, source, metadata, embedding, is_synthetic)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(ioc) DO UPDATE SET
+                    risk_level = excluded.risk_level, category = excluded.category,
+                    confidence = excluded.confidence, last_seen = CURRENT_TIMESTAMP,
+                    times_seen = times_seen + 1, metadata = excluded.metadata,
+                    embedding = excluded.embedding
+            ''', rows)
+            conn.commit()
+            self._refresh_ioc_index(conn, 'ioc', [row[0] for row in rows])
+        return len(rows)
     
     def store_ttp_mapping(self, ioc_id: int, ttp_id: str, ttp_name: str = None, 
                          ttp_description: str = None, confidence: float = 0.0):
@@ -200,46 +374,209 @@ class ThreatMemoryDB:
                  confidence, processing_time, embedding))
             conn.commit()
     
-    def search_similar_iocs(self, query: str, limit: int = 5) -> List[Dict]:
-        """Search for similar IOCs using vector similarity."""
-        if not self.embedding_model:
-            return self.search_iocs_text(query, limit)
+    def store_analyses_bulk(self, session_id: str, analysis_type: str,
+                            analyses: List[Dict[str, Any]]):
+        """
+        Store many analysis history rows in a single transaction.
+        
+        Each entry holds ``input_data``, ``output_data`` and optionally
+        ``confidence`` / ``processing_time``, as for ``store_analysis``.
+        """
+        rows = []
+        for a in analyses:
+            input_data, output_data = a['input_data'], a['output_data']
+            input_text = json.dumps(input_data) if not isinstance(input_data, str) else input_data
+            output_text = json.dumps(output_data) if not isinstance(output_data, str) else output_data
+            rows.append((session_id, analysis_type, input_text, output_text,
+                         a.get('confidence', 0.0), a.get('processing_time', 0.0)))
+        
+        embeddings = self._get_embeddings([f"{analysis_type} {row[2]}" for row in rows])
+        rows = [row + (embedding,) for row, embedding in zip(rows, embeddings)]
+        
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO analysis_history (session_id, analysis_type, input_data, 
+                                            output_data, confidence, processing_time, embedding)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+    
+    def store_knowledge_pattern(self, pattern_type: str, pattern_text: str,
+                                pattern_rules: Any = None, effectiveness_score: float = 0.0):
+        """Store or refresh a single knowledge pattern."""
+        self.store_knowledge_patterns_bulk([{
+            'type': pattern_type,
+            'text': pattern_text,
+            'rules': pattern_rules,
+            'score': effectiveness_score
+        }])
+    
+    def store_knowledge_patterns_bulk(self, patterns: List[Dict[str, Any]]):
+        """
+        Store or refresh many knowledge patterns in a single transaction.
         
-        query_embedding = self.embedding_model.encode([query])[0]
+        Each entry holds ``type``, ``text``, ``rules`` (dict or JSON string) and
+        ``score``. A pattern with the same type and text replaces its rules and
+        effectiveness score.
+        """
+        rows = [
+            (p['type'], p['text'],
+             _json_dumps(p.get('rules')) if not isinstance(p.get('rules'), str) else p['rules'],
+             p.get('score', 0.0))
+            for p in patterns
+        ]
+        if not rows:
+            return
         
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO knowledge_patterns (pattern_type, pattern_text, pattern_rules, effectiveness_score)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(pattern_type, pattern_text) DO UPDATE SET
+                    pattern_rules = excluded.pattern_rules,
+                    effectiveness_score = excluded.effectiveness_score,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', rows)
+    
+    @staticmethod
+    def _ioc_row_to_dict(row: tuple, similarity: float) -> Dict:
+        """Convert an iocs row (id .. metadata) into a search result."""
+        return {
+            'id': row[0],
+            'ioc': row[1],
+            'ioc_type': row[2],
+            'risk_level': row[3],
+            'category': row[4],
+            'confidence': row[5],
+            'times_seen': row[6],
+            'first_seen': row[7],
+            'last_seen': row[8],
+            'metadata': json.loads(row[9] or '{}'),
+            'similarity': similarity
+        }
+    
+    _IOC_ROW_COLUMNS = '''id, ioc, ioc_type, risk_level, category, confidence, 
+                       times_seen, first_seen, last_seen, metadata, embedding'''
+    
+    def _load_ioc_embeddings(self):
+        """Load IOC rows that have embeddings, with the embeddings stacked into a matrix."""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, ioc, ioc_type, risk_level, category, confidence, 
-                       times_seen, first_seen, last_seen, metadata, embedding
+            cursor.execute(f'''
+                SELECT {self._IOC_ROW_COLUMNS}
                 FROM iocs WHERE embedding IS NOT NULL
             ''')
+            rows = [row for row in cursor.fetchall() if row[10]]
+        
+        if not rows:
+            return rows, None
+        return rows, np.vstack([np.frombuffer(row[10], dtype=np.float32) for row in rows])
+    
+    def _get_ioc_index(self):
+        """Return (hnsw index, rows by id) over stored IOC embeddings, building it if needed."""
+        if self._ioc_index is None:
+            rows, vectors = self._load_ioc_embeddings()
+            if not rows:
+                return None
             
-            results = []
-            for row in cursor.fetchall():
-                if row[10]:  # embedding exists
-                    stored_embedding = np.frombuffer(row[10], dtype=np.float32)
-                    similarity = np.dot(query_embedding, stored_embedding) / (
-                        np.linalg.norm(query_embedding) * np.linalg.norm(stored_embedding)
-                    )
-                    
-                    results.append({
-                        'id': row[0],
-                        'ioc': row[1],
-                        'ioc_type': row[2],
-                        'risk_level': row[3],
-                        'category': row[4],
-                        'confidence': row[5],
-                        'times_seen': row[6],
-                        'first_seen': row[7],
-                        'last_seen': row[8],
-                        'metadata': json.loads(row[9] or '{}'),
-                        'similarity': float(similarity)
-                    })
+            index = hnswlib.Index(space='cosine', dim=vectors.shape[1])
+            index.init_index(max_elements=len(rows), ef_construction=200, M=16)
+            index.add_items(vectors, [row[0] for row in rows])
+            self._ioc_index = (index, {row[0]: row for row in rows})
+        return self._ioc_index
+    
+    def _refresh_ioc_index(self, conn: sqlite3.Connection, column: str, values: List[Any]):
+        """
+        Add or update just-written IOCs (matched on ``column``) in the HNSW index, if built.
+        
+        Call after committing: rows are re-read under the index lock, so an index
+        built concurrently either already contains them or is updated here.
+        """
+        with self._ioc_index_lock:
+            if self._ioc_index is None or not values:
+                return
+            index, rows_by_id = self._ioc_index
+            
+            rows = []
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                rows.extend(conn.execute(
+                    f'SELECT {self._IOC_ROW_COLUMNS} FROM iocs '
+                    f'WHERE {column} IN ({",".join("?" * len(chunk))})', chunk
+                ).fetchall())
+            
+            embedded = [row for row in rows if row[10]]
+            for row in rows:
+                if not row[10] and row[0] in rows_by_id:
+                    index.mark_deleted(row[0])
+                    del rows_by_id[row[0]]
+            if not embedded:
+                return
             
-            # Sort by similarity and return top results
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:limit]
+            needed = index.get_current_count() + len(embedded)
+            if needed > index.get_max_elements():
+                index.resize_index(max(needed, 2 * index.get_max_elements()))
+            # Existing labels are updated in place; new ones are inserted
+            index.add_items(
+                np.vstack([np.frombuffer(row[10], dtype=np.float32) for row in embedded]),
+                [row[0] for row in embedded]
+            )
+            rows_by_id.update((row[0], row) for row in embedded)
+    
+    def _search_embeddings(self, query_embeddings: np.ndarray, limit: int) -> List[List[Dict]]:
+        """Top-``limit`` stored IOCs by cosine similarity for each query embedding."""
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        
+        if HNSW_AVAILABLE:
+            with self._ioc_index_lock:
+                ioc_index = self._get_ioc_index()
+                if ioc_index is None or not ioc_index[1]:
+                    return [[] for _ in query_embeddings]
+                index, rows_by_id = ioc_index
+                k = min(limit, len(rows_by_id))
+                index.set_ef(max(64, k))
+                labels, distances = index.knn_query(query_embeddings, k=k)
+                rows = [[rows_by_id[label] for label in query_labels] for query_labels in labels]
+            return [
+                [self._ioc_row_to_dict(row, float(1.0 - distance))
+                 for row, distance in zip(query_rows, query_distances)]
+                for query_rows, query_distances in zip(rows, distances)
+            ]
+        
+        # Exact scan: one matrix product over all stored embeddings
+        rows, stored = self._load_ioc_embeddings()
+        if not rows:
+            return [[] for _ in query_embeddings]
+        
+        similarities = (query_embeddings @ stored.T) / (
+            np.linalg.norm(query_embeddings, axis=1)[:, None] * np.linalg.norm(stored, axis=1)[None, :]
+        )
+        return [
+            [self._ioc_row_to_dict(rows[i], float(scores[i])) for i in np.argsort(-scores)[:limit]]
+            for scores in similarities
+        ]
+    
+    def search_similar_iocs(self, query: str, limit: int = 5) -> List[Dict]:
+        """Search for similar IOCs using vector similarity."""
+        if not self.embedding_model:
+            return self.search_iocs_text(query, limit)
+        
+        query_embedding = self.embedding_model.encode([query])
+        return self._search_embeddings(query_embedding, limit)[0]
+    
+    def search_similar_iocs_batch(self, queries: List[str], limit: int = 5) -> List[List[Dict]]:
+        """
+        Run ``search_similar_iocs`` for many queries at once.
+        
+        The queries are embedded in a single model call and looked up together,
+        instead of re-reading the table and re-encoding per query. Returns one
+        result list per query.
+        """
+        if not queries:
+            return []
+        if not self.embedding_model:
+            return [self.search_iocs_text(query, limit) for query in queries]
+        
+        return self._search_embeddings(self.embedding_model.encode(list(queries)), limit)
     
     def search_iocs_text(self, query: str, limit: int = 5) -> List[Dict]:
         """Fallback text search for IOCs."""
@@ -254,19 +591,61 @@ class ThreatMemoryDB:
                 LIMIT ?
             ''', (f'%{query}%', f'%{query}%', f'%{query}%', limit))
             
-            return [{
-                'id': row[0],
-                'ioc': row[1],
-                'ioc_type': row[2],
-                'risk_level': row[3],
-                'category': row[4],
-                'confidence': row[5],
-                'times_seen': row[6],
-                'first_seen': row[7],
-                'last_seen': row[8],
-                'metadata': json.loads(row[9] or '{}'),
-                'similarity': 0.5  # Default similarity for text search
-            } for row in cursor.fetchall()]
+            # Default similarity for text search
+            return [self._ioc_row_to_dict(row, 0.5) for row in cursor.fetchall()]
+    
+    def find_similar_analysis(self, analysis_type: str, input_data: Any,
+                              threshold: Optional[float] = 0.93, max_age_seconds: int = 3600,
+                              candidates: int = 50) -> Optional[Dict]:
+        """
+        Find a recent analysis whose input matches or closely resembles input_data.
+        
+        An identical input is returned straight away; otherwise the most similar
+        of the latest ``candidates`` analyses is returned if its cosine
+        similarity is at least ``threshold``. With ``threshold`` None only an
+        identical input matches. Returns None when nothing qualifies.
+        """
+        input_text = json.dumps(input_data) if not isinstance(input_data, str) else input_data
+        
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT session_id, input_data, output_data, confidence, created_at, embedding
+                FROM analysis_history
+                WHERE analysis_type = ? AND created_at >= datetime('now', ?)
+                ORDER BY created_at DESC LIMIT ?
+            ''', (analysis_type, f'-{int(max_age_seconds)} seconds', candidates))
+            rows = cursor.fetchall()
+        
+        def to_dict(row, similarity):
+            return {
+                'session_id': row[0],
+                'input_data': row[1],
+                'output_data': row[2],
+                'confidence': row[3],
+                'created_at': row[4],
+                'similarity': similarity
+            }
+        
+        for row in rows:
+            if row[1] == input_text:
+                return to_dict(row, 1.0)
+        
+        if threshold is None:
+            return None
+        
+        embedded = [row for row in rows if row[5]]
+        query_embedding = self._get_embedding(f"{analysis_type} {input_text}")
+        if not embedded or query_embedding is None:
+            return None
+        
+        query = np.frombuffer(query_embedding, dtype=np.float32)
+        matrix = np.vstack([np.frombuffer(row[5], dtype=np.float32) for row in embedded])
+        similarities = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        return to_dict(embedded[best], float(similarities[best]))
     
     def get_analysis_history(self, analysis_type: str = None, limit: int = 10) -> List[Dict]:
         """Retrieve analysis history."""
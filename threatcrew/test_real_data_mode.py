@@ -106,7 +106,7 @@ def test_configuration_values():
         
         print(f"USE_REAL_DATA_ONLY: {use_real_only}")
         print(f"DISABLE_SYNTHETIC_DATA: {disable_synthetic}")
-        print(f"EXCLUDED_DATA_SOURCES: {excluded_sources}")
+        print(f"EXCLUDED_DATA_SOURCES: {sorted(excluded_sources)}")
         
         # Verify correct settings
         if use_real_only and disable_synthetic: